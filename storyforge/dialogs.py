@@ -1,7 +1,116 @@
+import logging
+import re
+from collections import deque
+from dataclasses import dataclass
+from functools import lru_cache
 import pygame
 import pygame_gui
 from pygame_gui.elements import *
-from typing import Optional, Callable, List, Dict
+from typing import Optional, Callable, List, Dict, NamedTuple, Sequence, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+# Built-in node templates by category; shared read-only by every TemplateDialog
+_TEMPLATES: Dict[str, Tuple[Dict[str, str], ...]] = {
+    'Dialogue': (
+        {
+            'id': 'greeting',
+            'name': 'NPC Greeting',
+            'description': 'Standard NPC greeting with player choices.'
+        },
+        {
+            'id': 'shop',
+            'name': 'Shop Interaction',
+            'description': 'Buy/sell interaction with shopkeeper.'
+        },
+        {
+            'id': 'hub_dialogue',
+            'name': 'Hub Dialogue',
+            'description': 'Central dialogue with multiple service options that return to main menu.'
+        },
+        {
+            'id': 'conditional_dialogue',
+            'name': 'Conditional Dialogue',
+            'description': 'Dialogue that appears only when conditions are met.'
+        },
+        {
+            'id': 'branching_choice',
+            'name': 'Branching Choice',
+            'description': 'Player choice that leads to different story paths.'
+        },
+        {
+            'id': 'reputation_dialogue',
+            'name': 'Reputation-Based Dialogue',
+            'description': 'Dialogue that changes based on player reputation.'
+        }
+    ),
+    'Quest': (
+        {
+            'id': 'fetch_quest',
+            'name': 'Fetch Quest',
+            'description': 'Retrieve item and return to NPC.'
+        },
+        {
+            'id': 'kill_quest',
+            'name': 'Elimination Quest',
+            'description': 'Defeat X enemies with progress tracking.'
+        },
+        {
+            'id': 'chain_quest',
+            'name': 'Quest Chain',
+            'description': 'Multi-part quest that unlocks additional quests.'
+        },
+        {
+            'id': 'daily_quest',
+            'name': 'Daily Quest',
+            'description': 'Repeatable quest that resets daily.'
+        },
+        {
+            'id': 'branching_quest',
+            'name': 'Branching Quest',
+            'description': 'Quest with multiple paths based on player choices.'
+        },
+        {
+            'id': 'timed_quest',
+            'name': 'Timed Quest',
+            'description': 'Quest with time limit and failure conditions.'
+        }
+    ),
+    'Flow Control': (
+        {
+            'id': 'condition_check',
+            'name': 'Condition Check',
+            'description': 'Check player state and branch accordingly.'
+        },
+        {
+            'id': 'resource_gate',
+            'name': 'Resource Gate',
+            'description': 'Gate content behind resource requirements.'
+        },
+        {
+            'id': 'merge_point',
+            'name': 'Merge Point',
+            'description': 'Convergence point for multiple dialogue/quest paths.'
+        },
+        {
+            'id': 'state_change',
+            'name': 'State Change',
+            'description': 'Modify player state, resources, or reputation.'
+        },
+        {
+            'id': 'time_gate',
+            'name': 'Time Gate',
+            'description': 'Content available only at specific times.'
+        }
+    )
+}
+
+# Each category's templates by display name, for selection lookups
+_TEMPLATE_BY_NAME: Dict[str, Dict[str, Dict[str, str]]] = {
+    category: {template['name']: template for template in templates}
+    for category, templates in _TEMPLATES.items()
+}
 
 
 class TemplateDialog(UIWindow):
@@ -23,7 +132,9 @@ class TemplateDialog(UIWindow):
         )
 
         self.on_template_selected: Optional[Callable] = None
-        self.templates = {}
+        self.templates = _TEMPLATES
+        self._template_by_name = _TEMPLATE_BY_NAME
+        self._listed_category: Optional[str] = None  # Category whose templates the template list shows
         self._create_ui()
         self._load_templates()
 
@@ -71,100 +182,6 @@ class TemplateDialog(UIWindow):
     # Enhanced templates in dialogs.py
     def _load_templates(self):
         """Load enhanced templates for all scenarios"""
-        self.templates = {
-            'Dialogue': [
-                {
-                    'id': 'greeting',
-                    'name': 'NPC Greeting',
-                    'description': 'Standard NPC greeting with player choices.'
-                },
-                {
-                    'id': 'shop',
-                    'name': 'Shop Interaction',
-                    'description': 'Buy/sell interaction with shopkeeper.'
-                },
-                {
-                    'id': 'hub_dialogue',
-                    'name': 'Hub Dialogue',
-                    'description': 'Central dialogue with multiple service options that return to main menu.'
-                },
-                {
-                    'id': 'conditional_dialogue',
-                    'name': 'Conditional Dialogue',
-                    'description': 'Dialogue that appears only when conditions are met.'
-                },
-                {
-                    'id': 'branching_choice',
-                    'name': 'Branching Choice',
-                    'description': 'Player choice that leads to different story paths.'
-                },
-                {
-                    'id': 'reputation_dialogue',
-                    'name': 'Reputation-Based Dialogue',
-                    'description': 'Dialogue that changes based on player reputation.'
-                }
-            ],
-            'Quest': [
-                {
-                    'id': 'fetch_quest',
-                    'name': 'Fetch Quest',
-                    'description': 'Retrieve item and return to NPC.'
-                },
-                {
-                    'id': 'kill_quest',
-                    'name': 'Elimination Quest',
-                    'description': 'Defeat X enemies with progress tracking.'
-                },
-                {
-                    'id': 'chain_quest',
-                    'name': 'Quest Chain',
-                    'description': 'Multi-part quest that unlocks additional quests.'
-                },
-                {
-                    'id': 'daily_quest',
-                    'name': 'Daily Quest',
-                    'description': 'Repeatable quest that resets daily.'
-                },
-                {
-                    'id': 'branching_quest',
-                    'name': 'Branching Quest',
-                    'description': 'Quest with multiple paths based on player choices.'
-                },
-                {
-                    'id': 'timed_quest',
-                    'name': 'Timed Quest',
-                    'description': 'Quest with time limit and failure conditions.'
-                }
-            ],
-            'Flow Control': [
-                {
-                    'id': 'condition_check',
-                    'name': 'Condition Check',
-                    'description': 'Check player state and branch accordingly.'
-                },
-                {
-                    'id': 'resource_gate',
-                    'name': 'Resource Gate',
-                    'description': 'Gate content behind resource requirements.'
-                },
-                {
-                    'id': 'merge_point',
-                    'name': 'Merge Point',
-                    'description': 'Convergence point for multiple dialogue/quest paths.'
-                },
-                {
-                    'id': 'state_change',
-                    'name': 'State Change',
-                    'description': 'Modify player state, resources, or reputation.'
-                },
-                {
-                    'id': 'time_gate',
-                    'name': 'Time Gate',
-                    'description': 'Content available only at specific times.'
-                }
-            ]
-        }
-
         # Populate category list
         categories = list(self.templates.keys())
         self.category_list.set_item_list(categories)
@@ -175,15 +192,25 @@ class TemplateDialog(UIWindow):
 
     def _update_template_list(self, category: str):
         """Update template list based on selected category"""
-        print(f"Updating template list for category: {category}")
+        logger.debug("TemplateDialog: Updating template list for category %s", category)
         if category in self.templates:
-            template_names = [t['name'] for t in self.templates[category]]
-            self.template_list.set_item_list(template_names)
-            print(f"Set template list with {len(template_names)} items: {template_names}")
+            # Rebuilding the list is costly; skip it if this category is listed already with nothing selected
+            if category != self._listed_category or self.template_list.get_single_selection() is not None:
+                template_names = [t['name'] for t in self.templates[category]]
+                self.template_list.set_item_list(template_names)
+                self._listed_category = category
+                logger.debug("TemplateDialog: Set template list with %d items: %s",
+                             len(template_names), template_names)
 
             # Clear description
-            self.description_box.html_text = "Select a template to see its description."
-            self.description_box.rebuild()
+            self._set_description("Select a template to see its description.")
+
+    def _set_description(self, html_text: str):
+        """Show html_text in the description box, skipping the costly rebuild if it is already shown"""
+        if self.description_box.html_text == html_text:
+            return
+        self.description_box.html_text = html_text
+        self.description_box.rebuild()
 
     def process_event(self, event: pygame.event.Event) -> bool:
         """Handle dialog events"""
@@ -192,11 +219,11 @@ class TemplateDialog(UIWindow):
         if event.type == pygame.USEREVENT:
             if event.user_type == pygame_gui.UI_SELECTION_LIST_NEW_SELECTION:
                 if event.ui_element == self.category_list:
-                    print(f"Category selected: {event.text}")
+                    logger.debug("TemplateDialog: Category selected: %s", event.text)
                     self._update_template_list(event.text)
                     return True
                 elif event.ui_element == self.template_list:
-                    print(f"Template selected: {event.text}")
+                    logger.debug("TemplateDialog: Template selected: %s", event.text)
                     self._update_description(event.text)
                     return True
 
@@ -213,33 +240,97 @@ class TemplateDialog(UIWindow):
     def _update_description(self, template_name: str):
         """Update description based on selected template"""
         selected_category = self.category_list.get_single_selection()
-        if selected_category and selected_category in self.templates:
-            for template in self.templates[selected_category]:
-                if template['name'] == template_name:
-                    self.description_box.html_text = f"<b>{template['name']}</b><br><br>{template['description']}"
-                    self.description_box.rebuild()
-                    print(f"Updated description for: {template_name}")
-                    break
+        template = self._template_by_name.get(selected_category, {}).get(template_name)
+        if template:
+            self._set_description(f"<b>{template['name']}</b><br><br>{template['description']}")
+            logger.debug("TemplateDialog: Updated description for %s", template_name)
 
     def _handle_create(self):
         """Handle template creation"""
         selected_category = self.category_list.get_single_selection()
         selected_template = self.template_list.get_single_selection()
 
-        print(f"Creating template - Category: {selected_category}, Template: {selected_template}")
+        logger.debug("TemplateDialog: Creating template - Category: %s, Template: %s",
+                     selected_category, selected_template)
 
         if selected_category and selected_template:
             # Find template ID
-            for template in self.templates[selected_category]:
-                if template['name'] == selected_template:
-                    print(f"Found template ID: {template['id']}")
-                    if self.on_template_selected:
-                        self.on_template_selected(template['id'])
-                    break
+            template = self._template_by_name.get(selected_category, {}).get(selected_template)
+            if template:
+                logger.debug("TemplateDialog: Found template ID %s", template['id'])
+                if self.on_template_selected:
+                    self.on_template_selected(template['id'])
 
         self.kill()
 
 
+# Titles containing any of these words mark intentional end nodes, in any letter case
+_END_TITLE_RE = re.compile('end|finish|complete|exit', re.IGNORECASE)
+# Node type values that end a flow by design
+_END_NODE_TYPES = frozenset(('end', 'complete'))
+# Basic checks for common condition patterns
+_CONDITION_PATTERNS = (
+    'player.level', 'player.gold', 'player.', 'flags.', 'reputation.',
+    '>', '<', '>=', '<=', '==', '!=', 'and', 'or', 'not',
+    'True', 'False', 'has_item', 'quest_completed'
+)
+
+
+# Issue severities; every issue shares one of these two strings
+_LEVEL_ERROR = 'error'
+_LEVEL_WARNING = 'warning'
+
+
+@dataclass(slots=True)
+class ValidationIssue:
+    """A problem found by project validation"""
+    id: str
+    level: str  # _LEVEL_ERROR or _LEVEL_WARNING
+    title: str
+    description: str
+    node_id: str = ""
+    connection_id: str = ""
+    auto_fixable: bool = False
+    suggested_fix: str = ""
+    nodes_involved: Sequence[str] = ()  # Nodes on a reported cycle
+
+
+class _GraphIndex(NamedTuple):
+    """Adjacency views of the connection graph shared by the topology validators"""
+    outgoing: Dict[str, List[str]]  # Targets per source node, in connection order
+    incoming: Set[str]  # Nodes that are the target of at least one connection
+    connected: Set[str]  # Nodes on either end of at least one connection
+
+
+def _build_graph_indices(connections: Dict) -> _GraphIndex:
+    """Build every adjacency view in a single pass over the connections"""
+    outgoing: Dict[str, List[str]] = {}
+    incoming: Set[str] = set()
+
+    for conn in connections.values():
+        targets = outgoing.get(conn.from_node)
+        if targets is None:
+            targets = outgoing[conn.from_node] = []
+        targets.append(conn.to_node)
+        incoming.add(conn.to_node)
+
+    return _GraphIndex(outgoing, incoming, incoming.union(outgoing))
+
+
+def _split_node_kinds(nodes: Dict) -> Tuple[Dict, Dict]:
+    """Quest nodes (those with objectives) and dialogue nodes (those with a speaker), in one pass"""
+    quest_nodes = {}
+    dialogue_nodes = {}
+
+    for node_id, node in nodes.items():
+        if hasattr(node, 'objectives'):
+            quest_nodes[node_id] = node
+        if hasattr(node, 'speaker'):
+            dialogue_nodes[node_id] = node
+
+    return quest_nodes, dialogue_nodes
+
+
 class ValidationDialog(UIWindow):
     def __init__(self, manager: pygame_gui.UIManager, screen_size: tuple):
         # Center the dialog
@@ -258,7 +349,7 @@ class ValidationDialog(UIWindow):
             object_id="#validation_dialog"
         )
 
-        self.validation_issues: List[Dict] = []
+        self.validation_issues: List[ValidationIssue] = []
         self._create_ui()
 
     def _create_ui(self):
@@ -302,199 +393,193 @@ class ValidationDialog(UIWindow):
             container=self
         )
 
-    def validate_project(self, nodes: Dict, connections: Dict) -> List[Dict]:
+    def validate_project(self, nodes: Dict, connections: Dict) -> List[ValidationIssue]:
         """Enhanced validation for all scenarios"""
         issues = []
+        graph = _build_graph_indices(connections)
+        quest_nodes, dialogue_nodes = _split_node_kinds(nodes)
 
         # Basic validations
         issues.extend(self._validate_basic_nodes(nodes))
         issues.extend(self._validate_connections(connections, nodes))
 
         # Graph topology validations
-        issues.extend(self._validate_circular_dependencies(connections))
-        issues.extend(self._validate_unreachable_nodes(nodes, connections))
-        issues.extend(self._validate_dead_ends(nodes, connections))
+        if graph.outgoing:
+            issues.extend(self._validate_circular_dependencies(graph))
+        issues.extend(self._validate_unreachable_nodes(nodes, graph))
+        issues.extend(self._validate_dead_ends(nodes, graph))
 
         # Content validations
-        issues.extend(self._validate_orphaned_nodes(nodes, connections))
+        issues.extend(self._validate_orphaned_nodes(nodes, graph))
         issues.extend(self._validate_conditions(nodes, connections))
         issues.extend(self._validate_resource_requirements(nodes, connections))
-        issues.extend(self._validate_quest_chains(nodes, connections))
-        issues.extend(self._validate_dialogue_flows(nodes, connections))
+
+        # Kind-specific validations only run when the project has nodes of that kind
+        if quest_nodes:
+            issues.extend(self._validate_quest_chains(quest_nodes))
+        if dialogue_nodes:
+            issues.extend(self._validate_dialogue_flows(dialogue_nodes))
 
         self.validation_issues = issues
         self._update_ui()
         return issues
 
     @staticmethod
-    def _validate_basic_nodes(nodes: Dict) -> List[Dict]:
+    def _validate_basic_nodes(nodes: Dict) -> List[ValidationIssue]:
         """Validate basic node properties"""
         issues = []
 
         for node_id, node in nodes.items():
             # Check for empty titles
             if not node.title or node.title.strip() == "":
-                issues.append({
-                    'id': f'empty_title_{node_id}',
-                    'level': 'warning',
-                    'title': f'Empty title in {node.node_type.value} node',
-                    'description': f'Node {node_id} has no title set.',
-                    'node_id': node_id,
-                    'auto_fixable': True,
-                    'suggested_fix': 'Set a descriptive title for this node.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'empty_title_{node_id}',
+                    level=_LEVEL_WARNING,
+                    title=f'Empty title in {node.node_type.value} node',
+                    description=f'Node {node_id} has no title set.',
+                    node_id=node_id,
+                    auto_fixable=True,
+                    suggested_fix='Set a descriptive title for this node.'
+                ))
 
             # Check dialogue-specific issues
             if hasattr(node, 'text') and (not node.text or node.text.strip() == ""):
-                issues.append({
-                    'id': f'empty_text_{node_id}',
-                    'level': 'error',
-                    'title': f'Empty dialogue text',
-                    'description': f'Dialogue node "{node.title}" has no text content.',
-                    'node_id': node_id,
-                    'auto_fixable': True,
-                    'suggested_fix': 'Add dialogue text to this node.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'empty_text_{node_id}',
+                    level=_LEVEL_ERROR,
+                    title=f'Empty dialogue text',
+                    description=f'Dialogue node "{node.title}" has no text content.',
+                    node_id=node_id,
+                    auto_fixable=True,
+                    suggested_fix='Add dialogue text to this node.'
+                ))
 
             # Check quest-specific issues
             if hasattr(node, 'objectives') and len(node.objectives) == 0:
-                issues.append({
-                    'id': f'no_objectives_{node_id}',
-                    'level': 'error',
-                    'title': f'Quest has no objectives',
-                    'description': f'Quest "{node.title}" has no objectives defined.',
-                    'node_id': node_id,
-                    'auto_fixable': True,
-                    'suggested_fix': 'Add at least one objective to this quest.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'no_objectives_{node_id}',
+                    level=_LEVEL_ERROR,
+                    title=f'Quest has no objectives',
+                    description=f'Quest "{node.title}" has no objectives defined.',
+                    node_id=node_id,
+                    auto_fixable=True,
+                    suggested_fix='Add at least one objective to this quest.'
+                ))
 
         return issues
 
     @staticmethod
-    def _validate_connections(connections: Dict, nodes: Dict) -> List[Dict]:
+    def _validate_connections(connections: Dict, nodes: Dict) -> List[ValidationIssue]:
         """Validate connection integrity"""
         issues = []
 
         for conn_id, conn in connections.items():
             # Check if connected nodes exist
             if conn.from_node not in nodes:
-                issues.append({
-                    'id': f'missing_from_node_{conn_id}',
-                    'level': 'error',
-                    'title': 'Connection references missing node',
-                    'description': f'Connection {conn_id} references non-existent source node {conn.from_node}',
-                    'connection_id': conn_id,
-                    'auto_fixable': False,
-                    'suggested_fix': 'Remove this connection or create the missing node.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'missing_from_node_{conn_id}',
+                    level=_LEVEL_ERROR,
+                    title='Connection references missing node',
+                    description=f'Connection {conn_id} references non-existent source node {conn.from_node}',
+                    connection_id=conn_id,
+                    auto_fixable=False,
+                    suggested_fix='Remove this connection or create the missing node.'
+                ))
 
             if conn.to_node not in nodes:
-                issues.append({
-                    'id': f'missing_to_node_{conn_id}',
-                    'level': 'error',
-                    'title': 'Connection references missing node',
-                    'description': f'Connection {conn_id} references non-existent target node {conn.to_node}',
-                    'connection_id': conn_id,
-                    'auto_fixable': False,
-                    'suggested_fix': 'Remove this connection or create the missing node.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'missing_to_node_{conn_id}',
+                    level=_LEVEL_ERROR,
+                    title='Connection references missing node',
+                    description=f'Connection {conn_id} references non-existent target node {conn.to_node}',
+                    connection_id=conn_id,
+                    auto_fixable=False,
+                    suggested_fix='Remove this connection or create the missing node.'
+                ))
 
         return issues
 
     @staticmethod
-    def _validate_circular_dependencies(connections: Dict) -> List[Dict]:
+    def _validate_circular_dependencies(graph_index: _GraphIndex) -> List[ValidationIssue]:
         """Check for circular dependencies in ALL connections - FIXED VERSION"""
         issues = []
 
-        # Build complete connection graph (not just prerequisites)
-        graph = {}
-        connection_map = {}  # Track which connection created each edge
+        # Complete connection graph (not just prerequisites)
+        graph = graph_index.outgoing
 
-        for conn_id, conn in connections.items():
-            # Add all connections to the graph, regardless of type
-            if conn.from_node not in graph:
-                graph[conn.from_node] = []
-            graph[conn.from_node].append(conn.to_node)
-
-            # Track which connection created this edge for better error reporting
-            edge_key = f"{conn.from_node}->{conn.to_node}"
-            if edge_key not in connection_map:
-                connection_map[edge_key] = []
-            connection_map[edge_key].append(conn_id)
-
-        # Check for cycles using DFS - FIXED VERSION
+        # Check for cycles using an iterative DFS; path mirrors the stack of open neighbour iterators
         WHITE, GRAY, BLACK = 0, 1, 2
         colors = {}
 
-        def dfs_visit(temp_node, path):
-            if temp_node not in colors:
-                colors[temp_node] = WHITE
-
-            if colors[temp_node] == GRAY:
-                # Found a back edge - this is a cycle
-                # The node is already in our current path, find where it starts
-                if temp_node in path:
-                    cycle_start_idx = path.index(temp_node)
-                    cycle_nodes = path[cycle_start_idx:] + [temp_node]
-
-                    # Create a more detailed cycle description
-                    cycle_description = []
-                    for i in range(len(cycle_nodes) - 1):
-                        from_node = cycle_nodes[i]
-                        to_node = cycle_nodes[i + 1]
-                        cycle_description.append(f"{from_node} -> {to_node}")
-
-                    issues.append({
-                        'id': f'circular_dependency_{temp_node}_{len(issues)}',
-                        'level': 'error',
-                        'title': 'Circular dependency detected',
-                        'description': f'Circular dependency found: {" -> ".join(cycle_description)}',
-                        'nodes_involved': cycle_nodes[:-1],  # Remove duplicate last node
-                        'auto_fixable': False,
-                        'suggested_fix': 'Remove one of the connections in the cycle to break the circular dependency.'
-                    })
-                return True
-
-            if colors[temp_node] == BLACK:
-                return False
-
-            # Mark as currently being processed
-            colors[temp_node] = GRAY
-            current_path = path + [temp_node]
-
-            # Visit all neighbors
-            for neighbor in graph.get(temp_node, []):
-                if dfs_visit(neighbor, current_path):
-                    return True
-
-            # Mark as completely processed
-            colors[temp_node] = BLACK
-            return False
-
         # Check each node as a potential start of a cycle
         for node in graph:
-            if node not in colors or colors[node] == WHITE:
-                dfs_visit(node, [])
+            if colors.get(node, WHITE) != WHITE:
+                continue
+
+            colors[node] = GRAY
+            path = [node]
+            path_set = {node}
+            stack = [iter(graph[node])]
+
+            while stack:
+                neighbor = next(stack[-1], None)
+
+                if neighbor is None:
+                    # All neighbors visited - mark as completely processed
+                    stack.pop()
+                    finished = path.pop()
+                    path_set.discard(finished)
+                    colors[finished] = BLACK
+                    continue
+
+                color = colors.get(neighbor, WHITE)
+
+                if color == GRAY:
+                    # Found a back edge - this is a cycle
+                    # The node is already in our current path, find where it starts
+                    if neighbor in path_set:
+                        cycle_start_idx = path.index(neighbor)
+                        cycle_nodes = path[cycle_start_idx:] + [neighbor]
+
+                        # Create a more detailed cycle description
+                        cycle_description = []
+                        for i in range(len(cycle_nodes) - 1):
+                            from_node = cycle_nodes[i]
+                            to_node = cycle_nodes[i + 1]
+                            cycle_description.append(f"{from_node} -> {to_node}")
+
+                        issues.append(ValidationIssue(
+                            id=f'circular_dependency_{neighbor}_{len(issues)}',
+                            level=_LEVEL_ERROR,
+                            title='Circular dependency detected',
+                            description=f'Circular dependency found: {" -> ".join(cycle_description)}',
+                            nodes_involved=cycle_nodes[:-1],  # Remove duplicate last node
+                            auto_fixable=False,
+                            suggested_fix=('Remove one of the connections in the cycle '
+                                           'to break the circular dependency.')
+                        ))
+                    # One cycle per start node is enough; stop exploring from here
+                    break
+
+                if color == WHITE:
+                    # Mark as currently being processed
+                    colors[neighbor] = GRAY
+                    path.append(neighbor)
+                    path_set.add(neighbor)
+                    stack.append(iter(graph.get(neighbor, ())))
 
         return issues
 
     @staticmethod
-    def _validate_unreachable_nodes(nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_unreachable_nodes(nodes: Dict, graph_index: _GraphIndex) -> List[ValidationIssue]:
         """Check for nodes that can never be reached"""
         issues = []
 
-        if not nodes or not connections:
+        graph = graph_index.outgoing
+        if not nodes or not graph:
             return issues
 
-        # Build adjacency list
-        graph = {}
-        incoming = set()
-
-        for conn in connections.values():
-            if conn.from_node not in graph:
-                graph[conn.from_node] = []
-            graph[conn.from_node].append(conn.to_node)
-            incoming.add(conn.to_node)
+        incoming = graph_index.incoming
 
         # Find potential start nodes (nodes with no incoming connections)
         all_nodes = set(nodes.keys())
@@ -505,99 +590,88 @@ class ValidationDialog(UIWindow):
             if all_nodes:
                 start_nodes = {next(iter(all_nodes))}
 
-        # DFS from start nodes to find reachable nodes
-        reachable = set()
-
-        def dfs(temp_node):
-            if temp_node in reachable:
-                return
-            reachable.add(temp_node)
-            for neighbor in graph.get(temp_node, []):
-                dfs(neighbor)
+        # Breadth-first walk from all start nodes at once; each node is queued at most once
+        reachable = set(start_nodes)
+        queue = deque(start_nodes)
 
-        for start_node in start_nodes:
-            dfs(start_node)
+        while queue:
+            temp_node = queue.popleft()
+            for neighbor in graph.get(temp_node, ()):
+                if neighbor not in reachable:
+                    reachable.add(neighbor)
+                    queue.append(neighbor)
 
         # Find unreachable nodes
         unreachable = all_nodes - reachable
 
         for node_id in unreachable:
             node = nodes[node_id]
-            issues.append({
-                'id': f'unreachable_node_{node_id}',
-                'level': 'warning',
-                'title': 'Unreachable node',
-                'description': f'Node "{node.title}" cannot be reached from any start point.',
-                'node_id': node_id,
-                'auto_fixable': False,
-                'suggested_fix': 'Add a connection path from a start node or remove this node.'
-            })
+            issues.append(ValidationIssue(
+                id=f'unreachable_node_{node_id}',
+                level=_LEVEL_WARNING,
+                title='Unreachable node',
+                description=f'Node "{node.title}" cannot be reached from any start point.',
+                node_id=node_id,
+                auto_fixable=False,
+                suggested_fix='Add a connection path from a start node or remove this node.'
+            ))
 
         return issues
 
     @staticmethod
-    def _validate_dead_ends(nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_dead_ends(nodes: Dict, graph_index: _GraphIndex) -> List[ValidationIssue]:
         """Check for nodes that lead nowhere (except designated end nodes)"""
         issues = []
 
-        # Build outgoing connections map
-        outgoing = {}
-        for conn in connections.values():
-            if conn.from_node not in outgoing:
-                outgoing[conn.from_node] = []
-            outgoing[conn.from_node].append(conn.to_node)
+        outgoing = graph_index.outgoing
 
         for node_id, node in nodes.items():
             # Skip if this is intentionally an end node
-            if (hasattr(node, 'title') and
-                    any(end_word in node.title.lower() for end_word in ['end', 'finish', 'complete', 'exit'])):
+            if hasattr(node, 'title') and _END_TITLE_RE.search(node.title):
                 continue
 
             # Skip if it's a quest completion or similar
-            if hasattr(node, 'node_type') and node.node_type.value in ['end', 'complete']:
+            if hasattr(node, 'node_type') and node.node_type.value in _END_NODE_TYPES:
                 continue
 
             # Check if node has no outgoing connections
             if node_id not in outgoing or len(outgoing[node_id]) == 0:
-                issues.append({
-                    'id': f'dead_end_{node_id}',
-                    'level': 'warning',
-                    'title': 'Potential dead end',
-                    'description': f'Node "{node.title}" has no outgoing connections.',
-                    'node_id': node_id,
-                    'auto_fixable': False,
-                    'suggested_fix': 'Add connections from this node or mark it as an end node.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'dead_end_{node_id}',
+                    level=_LEVEL_WARNING,
+                    title='Potential dead end',
+                    description=f'Node "{node.title}" has no outgoing connections.',
+                    node_id=node_id,
+                    auto_fixable=False,
+                    suggested_fix='Add connections from this node or mark it as an end node.'
+                ))
 
         return issues
 
     @staticmethod
-    def _validate_orphaned_nodes(nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_orphaned_nodes(nodes: Dict, graph_index: _GraphIndex) -> List[ValidationIssue]:
         """Check for nodes with no connections"""
         issues = []
 
-        connected_nodes = set()
-        for conn in connections.values():
-            connected_nodes.add(conn.from_node)
-            connected_nodes.add(conn.to_node)
+        connected_nodes = graph_index.connected
 
         for node_id, node in nodes.items():
             if node_id not in connected_nodes:
                 # Special case: start nodes don't need input connections
                 if not (hasattr(node, 'speaker') and 'start' in node.title.lower()):
-                    issues.append({
-                        'id': f'orphaned_node_{node_id}',
-                        'level': 'warning',
-                        'title': 'Orphaned node',
-                        'description': f'Node "{node.title}" has no connections.',
-                        'node_id': node_id,
-                        'auto_fixable': False,
-                        'suggested_fix': 'Connect this node to the dialogue/quest flow or remove it.'
-                    })
+                    issues.append(ValidationIssue(
+                        id=f'orphaned_node_{node_id}',
+                        level=_LEVEL_WARNING,
+                        title='Orphaned node',
+                        description=f'Node "{node.title}" has no connections.',
+                        node_id=node_id,
+                        auto_fixable=False,
+                        suggested_fix='Connect this node to the dialogue/quest flow or remove it.'
+                    ))
 
         return issues
 
-    def _validate_conditions(self, nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_conditions(self, nodes: Dict, connections: Dict) -> List[ValidationIssue]:
         """Validate condition syntax"""
         issues = []
 
@@ -606,33 +680,33 @@ class ValidationDialog(UIWindow):
             if hasattr(node, 'conditions'):
                 for condition in node.conditions:
                     if not self._is_valid_condition(condition):
-                        issues.append({
-                            'id': f'invalid_condition_{node_id}',
-                            'level': 'error',
-                            'title': 'Invalid condition syntax',
-                            'description': f'Node "{node.title}" has invalid condition: {condition}',
-                            'node_id': node_id,
-                            'auto_fixable': False,
-                            'suggested_fix': 'Fix the condition syntax or remove the condition.'
-                        })
+                        issues.append(ValidationIssue(
+                            id=f'invalid_condition_{node_id}',
+                            level=_LEVEL_ERROR,
+                            title='Invalid condition syntax',
+                            description=f'Node "{node.title}" has invalid condition: {condition}',
+                            node_id=node_id,
+                            auto_fixable=False,
+                            suggested_fix='Fix the condition syntax or remove the condition.'
+                        ))
 
         # Check connection conditions
         for conn_id, conn in connections.items():
             if conn.condition and not self._is_valid_condition(conn.condition):
-                issues.append({
-                    'id': f'invalid_connection_condition_{conn_id}',
-                    'level': 'error',
-                    'title': 'Invalid connection condition',
-                    'description': f'Connection has invalid condition: {conn.condition}',
-                    'connection_id': conn_id,
-                    'auto_fixable': False,
-                    'suggested_fix': 'Fix the condition syntax.'
-                })
+                issues.append(ValidationIssue(
+                    id=f'invalid_connection_condition_{conn_id}',
+                    level=_LEVEL_ERROR,
+                    title='Invalid connection condition',
+                    description=f'Connection has invalid condition: {conn.condition}',
+                    connection_id=conn_id,
+                    auto_fixable=False,
+                    suggested_fix='Fix the condition syntax.'
+                ))
 
         return issues
 
     @staticmethod
-    def _validate_resource_requirements(nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_resource_requirements(nodes: Dict, connections: Dict) -> List[ValidationIssue]:
         """Validate resource requirements are reasonable"""
         issues = []
 
@@ -641,117 +715,107 @@ class ValidationDialog(UIWindow):
             if hasattr(node, 'required_resources'):
                 for resource, amount in node.required_resources.items():
                     if amount < 0:
-                        issues.append({
-                            'id': f'negative_resource_{node_id}_{resource}',
-                            'level': 'warning',
-                            'title': 'Negative resource requirement',
-                            'description': f'Node "{node.title}" requires negative {resource}: {amount}',
-                            'node_id': node_id,
-                            'auto_fixable': True,
-                            'suggested_fix': 'Use positive values for resource requirements.'
-                        })
+                        issues.append(ValidationIssue(
+                            id=f'negative_resource_{node_id}_{resource}',
+                            level=_LEVEL_WARNING,
+                            title='Negative resource requirement',
+                            description=f'Node "{node.title}" requires negative {resource}: {amount}',
+                            node_id=node_id,
+                            auto_fixable=True,
+                            suggested_fix='Use positive values for resource requirements.'
+                        ))
                     elif amount > 999999:  # Unreasonably high
-                        issues.append({
-                            'id': f'high_resource_{node_id}_{resource}',
-                            'level': 'warning',
-                            'title': 'Very high resource requirement',
-                            'description': f'Node "{node.title}" requires {amount} {resource}. This seems very high.',
-                            'node_id': node_id,
-                            'auto_fixable': False,
-                            'suggested_fix': 'Consider if this resource requirement is intentional.'
-                        })
+                        issues.append(ValidationIssue(
+                            id=f'high_resource_{node_id}_{resource}',
+                            level=_LEVEL_WARNING,
+                            title='Very high resource requirement',
+                            description=f'Node "{node.title}" requires {amount} {resource}. This seems very high.',
+                            node_id=node_id,
+                            auto_fixable=False,
+                            suggested_fix='Consider if this resource requirement is intentional.'
+                        ))
 
         return issues
 
     @staticmethod
-    def _validate_quest_chains(nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_quest_chains(quest_nodes: Dict) -> List[ValidationIssue]:
         """Validate quest chain logic"""
         issues = []
 
-        quest_nodes = {k: v for k, v in nodes.items() if hasattr(v, 'objectives')}
-
         for node_id, quest in quest_nodes.items():
             # Check for quests with time limits but no failure conditions
             if hasattr(quest, 'time_limit') and quest.time_limit > 0:
                 if not hasattr(quest, 'can_fail') or not quest.can_fail:
-                    issues.append({
-                        'id': f'time_limit_no_fail_{node_id}',
-                        'level': 'warning',
-                        'title': 'Time limit without failure',
-                        'description': f'Quest "{quest.title}" has time limit but cannot fail.',
-                        'node_id': node_id,
-                        'auto_fixable': True,
-                        'suggested_fix': 'Enable failure for timed quests or remove time limit.'
-                    })
-
-            # Check objective dependencies
-            objective_ids = [obj.id for obj in quest.objectives]
+                    issues.append(ValidationIssue(
+                        id=f'time_limit_no_fail_{node_id}',
+                        level=_LEVEL_WARNING,
+                        title='Time limit without failure',
+                        description=f'Quest "{quest.title}" has time limit but cannot fail.',
+                        node_id=node_id,
+                        auto_fixable=True,
+                        suggested_fix='Enable failure for timed quests or remove time limit.'
+                    ))
+
+            # Check objective dependencies against the set of ids defined on this quest
+            objective_ids = {obj.id for obj in quest.objectives}
             for obj in quest.objectives:
                 for dep in obj.dependencies:
                     if dep not in objective_ids:
-                        issues.append({
-                            'id': f'missing_objective_dependency_{node_id}_{obj.id}',
-                            'level': 'error',
-                            'title': 'Missing objective dependency',
-                            'description': f'Objective "{obj.description}" depends on non-existent objective "{dep}"',
-                            'node_id': node_id,
-                            'auto_fixable': False,
-                            'suggested_fix': 'Add the missing objective or remove the dependency.'
-                        })
+                        issues.append(ValidationIssue(
+                            id=f'missing_objective_dependency_{node_id}_{obj.id}',
+                            level=_LEVEL_ERROR,
+                            title='Missing objective dependency',
+                            description=f'Objective "{obj.description}" depends on non-existent objective "{dep}"',
+                            node_id=node_id,
+                            auto_fixable=False,
+                            suggested_fix='Add the missing objective or remove the dependency.'
+                        ))
 
         return issues
 
     @staticmethod
-    def _validate_dialogue_flows(nodes: Dict, connections: Dict) -> List[Dict]:
+    def _validate_dialogue_flows(dialogue_nodes: Dict) -> List[ValidationIssue]:
         """Validate dialogue flow logic"""
         issues = []
 
-        dialogue_nodes = {k: v for k, v in nodes.items() if hasattr(v, 'speaker')}
-
         for node_id, dialogue in dialogue_nodes.items():
             # Check for choice nodes without choices
             if hasattr(dialogue, 'choices') and dialogue.node_type.value == 'choice':
                 if not dialogue.choices or len(dialogue.choices) == 0:
-                    issues.append({
-                        'id': f'choice_node_no_choices_{node_id}',
-                        'level': 'error',
-                        'title': 'Choice node without choices',
-                        'description': f'Choice node "{dialogue.title}" has no choices defined.',
-                        'node_id': node_id,
-                        'auto_fixable': True,
-                        'suggested_fix': 'Add choices to this node or change it to a regular dialogue node.'
-                    })
+                    issues.append(ValidationIssue(
+                        id=f'choice_node_no_choices_{node_id}',
+                        level=_LEVEL_ERROR,
+                        title='Choice node without choices',
+                        description=f'Choice node "{dialogue.title}" has no choices defined.',
+                        node_id=node_id,
+                        auto_fixable=True,
+                        suggested_fix='Add choices to this node or change it to a regular dialogue node.'
+                    ))
 
             # Check for hub nodes without return options
             if hasattr(dialogue, 'is_hub') and dialogue.is_hub:
                 if not hasattr(dialogue, 'hub_return_text') or not dialogue.hub_return_text:
-                    issues.append({
-                        'id': f'hub_no_return_{node_id}',
-                        'level': 'warning',
-                        'title': 'Hub without return text',
-                        'description': f'Hub dialogue "{dialogue.title}" has no return text.',
-                        'node_id': node_id,
-                        'auto_fixable': True,
-                        'suggested_fix': 'Add return text for the hub menu.'
-                    })
+                    issues.append(ValidationIssue(
+                        id=f'hub_no_return_{node_id}',
+                        level=_LEVEL_WARNING,
+                        title='Hub without return text',
+                        description=f'Hub dialogue "{dialogue.title}" has no return text.',
+                        node_id=node_id,
+                        auto_fixable=True,
+                        suggested_fix='Add return text for the hub menu.'
+                    ))
 
         return issues
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def _is_valid_condition(condition: str) -> bool:
-        """Basic condition syntax validation"""
+        """Basic condition syntax validation, cached per condition string"""
         if not condition or condition.strip() == "":
             return True
 
-        # Basic checks for common condition patterns
-        valid_patterns = [
-            'player.level', 'player.gold', 'player.', 'flags.', 'reputation.',
-            '>', '<', '>=', '<=', '==', '!=', 'and', 'or', 'not',
-            'True', 'False', 'has_item', 'quest_completed'
-        ]
-
         # Very basic validation - in reality you'd want a proper parser
-        return any(pattern in condition for pattern in valid_patterns)
+        return any(pattern in condition for pattern in _CONDITION_PATTERNS)
 
     def _update_ui(self):
         """Update the UI with validation results"""
@@ -762,16 +826,16 @@ class ValidationDialog(UIWindow):
             self.issues_list.set_item_list([])
         else:
             # Count by severity
-            errors = len([i for i in self.validation_issues if i['level'] == 'error'])
-            warnings = len([i for i in self.validation_issues if i['level'] == 'warning'])
+            errors = len([i for i in self.validation_issues if i.level == _LEVEL_ERROR])
+            warnings = len([i for i in self.validation_issues if i.level == _LEVEL_WARNING])
 
             self.summary_label.set_text(f"Found {issue_count} issues: {errors} errors, {warnings} warnings")
 
             # Create issue list items
             issue_items = []
             for issue in self.validation_issues:
-                icon = "X" if issue['level'] == 'error' else "!"
-                issue_items.append(f"{icon} {issue['title']}")
+                icon = "X" if issue.level == _LEVEL_ERROR else "!"
+                issue_items.append(f"{icon} {issue.title}")
 
             self.issues_list.set_item_list(issue_items)
 
@@ -799,20 +863,20 @@ class ValidationDialog(UIWindow):
         """Update details for selected issue"""
         # Find the issue by matching the display text
         for issue in self.validation_issues:
-            icon = "X" if issue['level'] == 'error' else "!"
-            display_text = f"{icon} {issue['title']}"
+            icon = "X" if issue.level == _LEVEL_ERROR else "!"
+            display_text = f"{icon} {issue.title}"
 
             if display_text == selected_issue:
-                details = f"<b>{issue['title']}</b><br><br>"
-                details += f"{issue['description']}<br><br>"
-                if issue.get('suggested_fix'):
-                    details += f"<i>Suggested fix:</i> {issue['suggested_fix']}"
+                details = f"<b>{issue.title}</b><br><br>"
+                details += f"{issue.description}<br><br>"
+                if issue.suggested_fix:
+                    details += f"<i>Suggested fix:</i> {issue.suggested_fix}"
 
                 self.details_box.html_text = details
                 self.details_box.rebuild()
 
                 # Enable/disable auto-fix button
-                self.fix_button.set_text('Auto-Fix' if issue.get('auto_fixable') else 'Manual Fix')
+                self.fix_button.set_text('Auto-Fix' if issue.auto_fixable else 'Manual Fix')
                 break
 
     def _handle_auto_fix(self):
@@ -823,18 +887,18 @@ class ValidationDialog(UIWindow):
 
         # Find and fix the issue
         for issue in self.validation_issues:
-            icon = "X" if issue['level'] == 'error' else "!"
-            display_text = f"{icon} {issue['title']}"
+            icon = "X" if issue.level == _LEVEL_ERROR else "!"
+            display_text = f"{icon} {issue.title}"
 
-            if display_text == selected_issue_text and issue.get('auto_fixable'):
+            if display_text == selected_issue_text and issue.auto_fixable:
                 # Implement auto-fixes
-                if 'empty_title' in issue['id']:
+                if 'empty_title' in issue.id:
                     # Would fix empty title
                     pass
-                elif 'empty_text' in issue['id']:
+                elif 'empty_text' in issue.id:
                     # Would fix empty text
                     pass
-                elif 'no_objectives' in issue['id']:
+                elif 'no_objectives' in issue.id:
                     # Would add default objective
                     pass
 
@@ -1,23 +1,142 @@
-from typing import Dict, List, Tuple
+import ast
+import json
+import logging
+import sys
+from typing import Any, Callable, Dict, FrozenSet, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, TextIO, Tuple
 from dataclasses import dataclass, field
-from node_system import BaseNode, NodeType, Port
+from enum import IntEnum
+from operator import attrgetter
+from types import CodeType
+from node_system import (BaseNode, NodeType, PortSpec, _EMPTY_DICT, _EMPTY_TUPLE, _empty_mapping,
+                         _export_ports, _ports_from_spec, _run_condition, _saved_ports, _writable,
+                         compile_condition, evaluate_condition)
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# Enum .value goes through a descriptor; export reads it once per node, so resolve it up front
+_NODE_TYPE_VALUES = {member: member.value for member in NodeType}
+
+
+class ConnectionKind(IntEnum):
+    NEXT = 0
+    CHOICE = 1
+    CONDITIONAL = 2
+
+
+class DialogueLink(NamedTuple):
+    """Resolved outgoing edge created through the DialogueManager.connect_* methods"""
+    target: BaseNode
+    kind: ConnectionKind
+    condition: Optional[CodeType] = None  # Compiled condition for CONDITIONAL links
+
+
+@dataclass(slots=True)
+class DialogueContext:
+    """Game state that dialogue choices are checked against"""
+    flags: Set[str] = field(default_factory=set)
+    resources: Dict[str, int] = field(default_factory=dict)
+    variables: Dict[str, Any] = field(default_factory=dict)  # Names visible to condition expressions
+
+
+def _parse_mapping(text: str, fallback: Dict) -> Dict:
+    """Parse a dict typed into the properties panel, keeping fallback if it isn't one"""
+    try:
+        value = ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return fallback
+    return value if isinstance(value, dict) else fallback
+
+
+# Port layouts for nodes built outside their class defaults
+_CHOICE_PORT_SPEC = (
+    PortSpec("input", "input", "dialogue"),
+    PortSpec("choice1", "output", "dialogue"),
+    PortSpec("choice2", "output", "dialogue"),
+    PortSpec("choice3", "output", "dialogue")
+)
+_END_PORT_SPEC = (
+    PortSpec("input", "input", "dialogue"),
+)
+
+
+@dataclass(slots=True)
 class DialogueChoice:
     """Represents a dialogue choice with conditions"""
     text: str = ""
     next: str = ""
     condition: str = ""
-    required_resources: Dict[str, int] = field(default_factory=dict)
-    required_flags: List[str] = field(default_factory=list)
-    state_changes: Dict[str, any] = field(default_factory=dict)
-    reputation_changes: Dict[str, int] = field(default_factory=dict)
-
-
-@dataclass
+    required_resources: Mapping[str, int] = field(default_factory=_empty_mapping)
+    required_flags: Sequence[str] = _EMPTY_TUPLE
+    state_changes: Mapping[str, Any] = field(default_factory=_empty_mapping)
+    reputation_changes: Mapping[str, int] = field(default_factory=_empty_mapping)
+
+    # Availability check built by DialogueManager, and the condition, resources and flags it was built from;
+    # assigning any of those fields makes it stale, in-place edits go through the add_* methods below
+    _predicate: Optional[Callable[[DialogueContext], bool]] = field(
+        default=None, init=False, repr=False, compare=False)
+    _predicate_inputs: Tuple[Any, ...] = field(default=(), init=False, repr=False, compare=False)
+
+    @property
+    def compiled_condition(self) -> Optional[CodeType]:
+        """Cached code object for the current condition text"""
+        return compile_condition(self.condition)
+
+    def _predicate_is_current(self) -> bool:
+        """Whether the cached predicate was built from the objects now in the requirement fields"""
+        inputs = self._predicate_inputs
+        return (bool(inputs) and inputs[0] is self.condition
+                and inputs[1] is self.required_resources and inputs[2] is self.required_flags)
+
+    def invalidate_predicate(self) -> None:
+        """Drop the cached availability check after editing the choice's requirements"""
+        self._predicate = None
+
+    def add_resource_req(self, resource: str, amount: int) -> None:
+        """Require an amount of a resource, giving the choice its own dict on first write"""
+        self.required_resources = resources = _writable(self.required_resources)
+        resources[resource] = amount
+        self._predicate = None
+
+    def add_required_flag(self, flag: str) -> None:
+        """Require a flag, giving the choice its own list on first write"""
+        flags = self.required_flags if isinstance(self.required_flags, list) else list(self.required_flags)
+        self.required_flags = flags
+        flags.append(flag)
+        self._predicate = None
+
+    def set_state_change(self, key: str, value: Any) -> None:
+        """Record a state change applied when the choice is taken"""
+        self.state_changes = changes = _writable(self.state_changes)
+        changes[key] = value
+
+    def set_reputation_change(self, faction: str, amount: int) -> None:
+        """Record a reputation change applied when the choice is taken"""
+        self.reputation_changes = changes = _writable(self.reputation_changes)
+        changes[faction] = amount
+
+
+@dataclass(slots=True)
 class DialogueNode(BaseNode):
     """Enhanced dialogue node"""
+    NODE_TYPE = NodeType.DIALOGUE
+    DEFAULT_COLOR = (100, 150, 200)  # Blue-ish
+    DEFAULT_SIZE = (250, 120)
+    PORT_SPEC = (
+        PortSpec("input", "input", "dialogue"),
+        PortSpec("output", "output", "dialogue")
+    )
+
+    # Hub nodes have one input and multiple outputs
+    HUB_NODE_TYPE = NodeType.HUB
+    HUB_COLOR = (150, 120, 200)  # Purple for hub
+    HUB_PORT_SPEC = (
+        PortSpec("input", "input", "dialogue"),
+        PortSpec("option_1", "output", "dialogue"),
+        PortSpec("option_2", "output", "dialogue"),
+        PortSpec("option_3", "output", "dialogue"),
+        PortSpec("return", "output", "dialogue")
+    )
+
     speaker: str = ""
     text: str = ""
     choices: List[DialogueChoice] = field(default_factory=list)
@@ -34,33 +153,24 @@ class DialogueNode(BaseNode):
     # State tracking
     times_seen: int = 0
 
-    def __post_init__(self):
+    # Choices grouped by target node id, kept in sync by add_choice/remove_choice
+    _choices_by_next: Dict[str, List[DialogueChoice]] = field(
+        default_factory=dict, init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
         if self.is_hub:
-            self.node_type = NodeType.HUB
-            self.color = (150, 120, 200)  # Purple for hub
+            self.node_type = self.HUB_NODE_TYPE
+            self.color = self.HUB_COLOR
         else:
-            self.node_type = NodeType.DIALOGUE
-            self.color = (100, 150, 200)  # Blue-ish
+            self.node_type = self.NODE_TYPE
+            self.color = self.DEFAULT_COLOR
 
-        self.size = (250, 120)
+        self.size = self.DEFAULT_SIZE
         self.needs_resize = True
 
         # Setup ports based on node type
         if not self.ports:
-            if self.is_hub:
-                # Hub nodes have one input and multiple outputs
-                self.ports = [
-                    Port(name="input", port_type="input", data_type="dialogue"),
-                    Port(name="option_1", port_type="output", data_type="dialogue"),
-                    Port(name="option_2", port_type="output", data_type="dialogue"),
-                    Port(name="option_3", port_type="output", data_type="dialogue"),
-                    Port(name="return", port_type="output", data_type="dialogue")
-                ]
-            else:
-                self.ports = [
-                    Port(name="input", port_type="input", data_type="dialogue"),
-                    Port(name="output", port_type="output", data_type="dialogue")
-                ]
+            self.ports = _ports_from_spec(self.HUB_PORT_SPEC if self.is_hub else self.PORT_SPEC)
 
         # Add properties for editing
         self.properties.update({
@@ -72,25 +182,70 @@ class DialogueNode(BaseNode):
             "is_hub": self.is_hub
         })
 
+        compile_condition(self.display_condition)
+        if self.choices:
+            self.rebuild_choice_index()
+
+    @property
+    def compiled_condition(self) -> Optional[CodeType]:
+        """Cached code object for the current display condition text"""
+        return compile_condition(self.display_condition)
+
+    def add_choice(self, choice: DialogueChoice) -> None:
+        """Append a choice and index it by target"""
+        self.choices.append(choice)
+        self._choices_by_next.setdefault(choice.next, []).append(choice)
+
+    def remove_choice(self, choice: DialogueChoice) -> bool:
+        """Remove a choice from the node and the target index"""
+        bucket = self._choices_by_next.get(choice.next, [])
+        for i, indexed in enumerate(bucket):
+            if indexed is choice:
+                del bucket[i]
+                break
+        else:
+            return False
+
+        if not bucket:
+            del self._choices_by_next[choice.next]
+        self.choices[:] = [c for c in self.choices if c is not choice]
+        return True
+
+    def choices_to(self, target_id: str) -> List[DialogueChoice]:
+        """Choices on this node that lead to target_id"""
+        return self._choices_by_next.get(target_id, [])
+
+    def rebuild_choice_index(self) -> None:
+        """Re-index choices after the list was replaced or edited directly"""
+        index: Dict[str, List[DialogueChoice]] = {}
+        for choice in self.choices:
+            index.setdefault(choice.next, []).append(choice)
+        self._choices_by_next = index
+
 
-@dataclass
+@dataclass(slots=True)
 class ConditionNode(BaseNode):
     """Node for checking conditions"""
+    NODE_TYPE = NodeType.CONDITION
+    DEFAULT_COLOR = (200, 200, 100)  # Yellow
+    DEFAULT_SIZE = (200, 100)
+    PORT_SPEC = (
+        PortSpec("input", "input", "any"),
+        PortSpec("true", "output", "any"),
+        PortSpec("false", "output", "any")
+    )
+
     condition: str = ""
     true_path: str = ""
     false_path: str = ""
 
-    def __post_init__(self):
-        self.node_type = NodeType.CONDITION
-        self.color = (200, 200, 100)  # Yellow
-        self.size = (200, 100)
+    def __post_init__(self) -> None:
+        self.node_type = self.NODE_TYPE
+        self.color = self.DEFAULT_COLOR
+        self.size = self.DEFAULT_SIZE
 
         if not self.ports:
-            self.ports = [
-                Port(name="input", port_type="input", data_type="any"),
-                Port(name="true", port_type="output", data_type="any"),
-                Port(name="false", port_type="output", data_type="any")
-            ]
+            self.ports = _ports_from_spec(self.PORT_SPEC)
 
         self.properties.update({
             "condition": self.condition,
@@ -98,62 +253,285 @@ class ConditionNode(BaseNode):
             "false_path": self.false_path
         })
 
+        compile_condition(self.condition)
+
+    @property
+    def compiled_condition(self) -> Optional[CodeType]:
+        """Cached code object for the current condition text"""
+        return compile_condition(self.condition)
+
 
-@dataclass
+@dataclass(slots=True)
 class MergeNode(BaseNode):
     """Node for merging multiple paths"""
+    NODE_TYPE = NodeType.MERGE
+    DEFAULT_COLOR = (150, 150, 150)  # Gray
+    DEFAULT_SIZE = (180, 80)
+    PORT_SPEC = (
+        PortSpec("input_1", "input", "any"),
+        PortSpec("input_2", "input", "any"),
+        PortSpec("input_3", "input", "any"),
+        PortSpec("output", "output", "any")
+    )
+
     merge_text: str = ""
 
-    def __post_init__(self):
-        self.node_type = NodeType.MERGE
-        self.color = (150, 150, 150)  # Gray
-        self.size = (180, 80)
+    def __post_init__(self) -> None:
+        self.node_type = self.NODE_TYPE
+        self.color = self.DEFAULT_COLOR
+        self.size = self.DEFAULT_SIZE
 
         if not self.ports:
-            self.ports = [
-                Port(name="input_1", port_type="input", data_type="any"),
-                Port(name="input_2", port_type="input", data_type="any"),
-                Port(name="input_3", port_type="input", data_type="any"),
-                Port(name="output", port_type="output", data_type="any")
-            ]
+            self.ports = _ports_from_spec(self.PORT_SPEC)
 
         self.properties.update({
             "merge_text": self.merge_text
         })
 
 
-@dataclass
+@dataclass(slots=True)
 class StateChangeNode(BaseNode):
     """Node for changing game state"""
-    state_changes: Dict[str, any] = field(default_factory=dict)
+    NODE_TYPE = NodeType.STATE_CHANGE
+    DEFAULT_COLOR = (200, 150, 100)  # Orange
+    DEFAULT_SIZE = (220, 100)
+    PORT_SPEC = (
+        PortSpec("input", "input", "any"),
+        PortSpec("output", "output", "any")
+    )
+
+    state_changes: Dict[str, Any] = field(default_factory=dict)
     reputation_changes: Dict[str, int] = field(default_factory=dict)
 
-    def __post_init__(self):
-        self.node_type = NodeType.STATE_CHANGE
-        self.color = (200, 150, 100)  # Orange
-        self.size = (220, 100)
+    def __post_init__(self) -> None:
+        self.node_type = self.NODE_TYPE
+        self.color = self.DEFAULT_COLOR
+        self.size = self.DEFAULT_SIZE
 
         if not self.ports:
-            self.ports = [
-                Port(name="input", port_type="input", data_type="any"),
-                Port(name="output", port_type="output", data_type="any")
-            ]
+            self.ports = _ports_from_spec(self.PORT_SPEC)
 
         self.properties.update({
-            "state_changes": str(self.state_changes),
-            "reputation_changes": str(self.reputation_changes)
+            "state_changes": self.state_changes,
+            "reputation_changes": self.reputation_changes
         })
 
+    def set_property(self, key: str, value: Any) -> None:
+        """Set a property, keeping the change dicts structured when edited as text"""
+        if key in ("state_changes", "reputation_changes") and isinstance(value, str):
+            value = _parse_mapping(value, getattr(self, key))
+        BaseNode.set_property(self, key, value)
+
+
+def _export_base_line(node: BaseNode) -> Dict:
+    """Line data for nodes without dialogue content"""
+    return {"speaker": "", "text": ""}
+
+
+# Choice fields that are only written when set; the importer falls back to empty values
+_CHOICE_OPTIONAL_FIELDS = ("condition", "required_resources", "state_changes", "reputation_changes")
+_choice_optional_values = attrgetter(*_CHOICE_OPTIONAL_FIELDS)
+
+
+def _export_choice(choice: DialogueChoice) -> Dict:
+    """Serialize a choice, leaving out empty optional fields"""
+    record = {"text": choice.text, "next": choice.next}
+    for key, value in zip(_CHOICE_OPTIONAL_FIELDS, _choice_optional_values(choice)):
+        if value:
+            record[key] = value
+    return record
+
+
+def _export_dialogue_line(node: DialogueNode) -> Dict:
+    """Line data for dialogue, hub, choice, start and end nodes"""
+    line_data: Dict[str, Any] = {
+        "speaker": node.speaker,
+        "text": node.text
+    }
+
+    # Add conditions if present
+    if node.display_condition:
+        line_data["condition"] = node.display_condition
+
+    if node.once_only:
+        line_data["once_only"] = True
+
+    # Add choices if they exist
+    if node.choices:
+        line_data["choices"] = [_export_choice(choice) for choice in node.choices]
+    elif node.next:
+        line_data["next"] = node.next
+
+    # Add hub properties
+    if node.is_hub:
+        line_data["is_hub"] = True
+        line_data["return_text"] = node.hub_return_text
+
+    return line_data
+
+
+def _export_condition_line(node: ConditionNode) -> Dict:
+    """Line data for condition nodes"""
+    return {
+        "speaker": "",
+        "text": "",
+        "condition_check": node.condition,
+        "true_path": node.true_path,
+        "false_path": node.false_path
+    }
+
+
+def _export_state_change_line(node: StateChangeNode) -> Dict:
+    """Line data for state change nodes"""
+    return {
+        "speaker": "",
+        "text": "",
+        "state_changes": node.state_changes,
+        "reputation_changes": node.reputation_changes
+    }
+
+
+_EXPORT_DISPATCH: Dict[type, Callable[[Any], Dict]] = {
+    DialogueNode: _export_dialogue_line,
+    ConditionNode: _export_condition_line,
+    MergeNode: _export_base_line,
+    StateChangeNode: _export_state_change_line
+}
+
+
+def _split_conditional(entry: str) -> Tuple[str, str]:
+    """Split a "condition -> target" entry written by connect_conditional into its two parts"""
+    condition, _, target = entry.rpartition(" -> ")
+    return condition, target
+
+
+def _first_line(data: Dict) -> Optional[Dict]:
+    """Return the first saved line of a dialogue entry, if any"""
+    lines = data.get("lines")
+    return lines[0] if lines else None
+
+
+def _import_condition(data: Dict) -> ConditionNode:
+    """Build a condition node from saved data"""
+    node = ConditionNode(
+        id=data["id"],
+        title=data.get("title", "Condition"),
+        position=data.get("position", (100, 100)),
+        ports=_saved_ports(data)
+    )
+    line = _first_line(data)
+    if line:
+        node.condition = line.get("condition_check", "")
+        node.true_path = line.get("true_path", "")
+        node.false_path = line.get("false_path", "")
+        compile_condition(node.condition)
+    return node
+
+
+def _import_merge(data: Dict) -> MergeNode:
+    """Build a merge node from saved data"""
+    return MergeNode(
+        id=data["id"],
+        title=data.get("title", "Merge"),
+        position=data.get("position", (100, 100)),
+        ports=_saved_ports(data)
+    )
+
+
+def _import_state_change(data: Dict) -> StateChangeNode:
+    """Build a state change node from saved data"""
+    node = StateChangeNode(
+        id=data["id"],
+        title=data.get("title", "State Change"),
+        position=data.get("position", (100, 100)),
+        ports=_saved_ports(data)
+    )
+    line = _first_line(data)
+    if line:
+        node.state_changes = line.get("state_changes", {})
+        node.reputation_changes = line.get("reputation_changes", {})
+    return node
+
+
+def _choice_from_dict(choice_data: Dict) -> DialogueChoice:
+    """Build a dialogue choice from saved data"""
+    choice = DialogueChoice(
+        text=choice_data.get("text", ""),
+        next=choice_data.get("next", ""),
+        condition=choice_data.get("condition", ""),
+        required_resources=choice_data.get("required_resources") or _EMPTY_DICT,
+        state_changes=choice_data.get("state_changes") or _EMPTY_DICT,
+        reputation_changes=choice_data.get("reputation_changes") or _EMPTY_DICT
+    )
+    compile_condition(choice.condition)
+    return choice
+
+
+def _import_dialogue(data: Dict) -> DialogueNode:
+    """Build a regular dialogue node from saved data.
+
+    This is the common case on import, so every field is passed to a single
+    constructor call and __post_init__ sees the final values.
+    """
+    node_id = data["id"]
+    fields = {
+        "id": node_id,
+        "title": data.get("title", f"Dialogue: {node_id}"),
+        "position": data.get("position", (100, 100)),
+        "ports": _saved_ports(data)
+    }
+
+    line = _first_line(data)
+    if line:
+        fields["speaker"] = sys.intern(line.get("speaker") or "")  # Saved files may hold null
+        fields["text"] = line.get("text", "")
+        fields["display_condition"] = line.get("condition", "")
+        fields["once_only"] = line.get("once_only", False)
+
+        if line.get("is_hub", False):
+            fields["is_hub"] = True
+            fields["hub_return_text"] = line.get("return_text", "")
+
+        if "choices" in line:
+            fields["choices"] = [_choice_from_dict(choice_data) for choice_data in line["choices"]]
+        elif "next" in line:
+            fields["next"] = line["next"]
+
+    return DialogueNode(**fields)
+
+
+_IMPORT_DISPATCH: Dict[str, Callable[[Dict], BaseNode]] = {
+    "condition": _import_condition,
+    "merge": _import_merge,
+    "state_change": _import_state_change
+}
+
 
 class DialogueManager:
     """Enhanced dialogue manager"""
 
-    def __init__(self):
+    # Title given by the "start" preset; dialogues carrying it are the entry points for pruning
+    START_TITLE = "Start Dialogue"
+
+    def __init__(self) -> None:
         self.dialogues: Dict[str, BaseNode] = {}
 
+        # Outgoing links by source id, holding node references rather than ids
+        self._adjacency: Dict[str, List[DialogueLink]] = {}
+
+        # Reachability results, valid while the graph version is unchanged
+        self._graph_version = 0
+        self._reachable_cache: Dict[Tuple[str, int], FrozenSet[str]] = {}
+
+    def mark_graph_changed(self) -> None:
+        """Invalidate cached traversals after nodes or links change"""
+        self._graph_version += 1
+        self._reachable_cache.clear()
+
     def create_dialogue_node(self, node_type: str, position: Tuple[int, int]) -> BaseNode:
         """Create enhanced dialogue nodes"""
 
+        node: BaseNode
         if node_type == "dialogue":
             node = DialogueNode(
                 title="New Dialogue",
@@ -197,15 +575,10 @@ class DialogueManager:
                 color=(200, 200, 100)
             )
             # Add multiple output ports for choices
-            node.ports = [
-                Port(name="input", port_type="input", data_type="dialogue"),
-                Port(name="choice1", port_type="output", data_type="dialogue"),
-                Port(name="choice2", port_type="output", data_type="dialogue"),
-                Port(name="choice3", port_type="output", data_type="dialogue")
-            ]
+            node.ports = _ports_from_spec(_CHOICE_PORT_SPEC)
         elif node_type == "start":
             node = DialogueNode(
-                title="Start Dialogue",
+                title=self.START_TITLE,
                 position=position,
                 speaker="System",
                 text="Welcome to the conversation!",
@@ -219,7 +592,7 @@ class DialogueManager:
                 color=(200, 100, 100)
             )
             # Remove output port for end nodes
-            node.ports = [Port(name="input", port_type="input", data_type="dialogue")]
+            node.ports = _ports_from_spec(_END_PORT_SPEC)
         else:
             # Default dialogue node
             node = DialogueNode(
@@ -228,206 +601,182 @@ class DialogueManager:
             )
 
         self.dialogues[node.id] = node
+        self.mark_graph_changed()
         return node
 
-    def create_connection(self, from_node: str, to_node: str, connection_type: str, **kwargs):
+    def create_connection(self, from_node: str, to_node: str, connection_type: str, **kwargs: Any) -> None:
         """Create enhanced connections between dialogue nodes"""
+        if connection_type == "next":
+            self.connect_next(from_node, to_node)
+        elif connection_type == "choice":
+            self.connect_choice(from_node, to_node,
+                                kwargs.get("choice_text", "New Choice"),
+                                kwargs.get("condition", ""),
+                                kwargs.get("required_resources"),
+                                kwargs.get("state_changes"))
+        elif connection_type == "conditional":
+            self.connect_conditional(from_node, to_node, kwargs.get("condition", "True"))
+
+    def _link_endpoints(self, from_node: str, to_node: str) -> Optional[Tuple[Any, BaseNode, List[DialogueLink]]]:
+        """Resolve both ends of a new link and the source's link list, or None if either end is missing"""
         from_dialogue = self.dialogues.get(from_node)
         to_dialogue = self.dialogues.get(to_node)
-
-        if from_dialogue and to_dialogue:
-            if connection_type == "next":
-                from_dialogue.next = to_node
-                from_dialogue.properties["next"] = to_node
-            elif connection_type == "choice":
-                # Handle choice connections with conditions
-                choice = DialogueChoice(
-                    text=kwargs.get("choice_text", "New Choice"),
-                    next=to_node,
-                    condition=kwargs.get("condition", ""),
-                    required_resources=kwargs.get("required_resources", {}),
-                    state_changes=kwargs.get("state_changes", {})
-                )
-                from_dialogue.choices.append(choice)
-            elif connection_type == "conditional":
-                # Add conditional connection
-                condition = kwargs.get("condition", "True")
-                from_dialogue.conditions.append(f"{condition} -> {to_node}")
-
-    def export_dialogues(self) -> List[Dict]:
-        """Export enhanced dialogues to JSON format"""
-        dialogues = []
-
+        if not (from_dialogue and to_dialogue):
+            return None
+        self.mark_graph_changed()
+        return from_dialogue, to_dialogue, self._adjacency.setdefault(from_node, [])
+
+    def connect_next(self, from_node: str, to_node: str) -> None:
+        """Set the default follow-up of a dialogue node"""
+        endpoints = self._link_endpoints(from_node, to_node)
+        if endpoints is None:
+            return
+        from_dialogue, to_dialogue, links = endpoints
+        # Only dialogue nodes have a next field; other nodes keep the link in their properties and the adjacency
+        if isinstance(from_dialogue, DialogueNode):
+            from_dialogue.next = to_node
+        from_dialogue.properties["next"] = to_node
+        links.append(DialogueLink(to_dialogue, ConnectionKind.NEXT))
+
+    def connect_choice(self, from_node: str, to_node: str, text: str = "New Choice", condition: str = "",
+                       required_resources: Optional[Dict[str, int]] = None,
+                       state_changes: Optional[Dict[str, Any]] = None) -> None:
+        """Add a player choice leading from one dialogue node to another"""
+        endpoints = self._link_endpoints(from_node, to_node)
+        if endpoints is None:
+            return
+        from_dialogue, to_dialogue, links = endpoints
+        # Handle choice connections with conditions
+        choice = DialogueChoice(
+            text=text,
+            next=to_node,
+            condition=condition,
+            required_resources=required_resources or _EMPTY_DICT,
+            state_changes=state_changes or _EMPTY_DICT
+        )
+        compile_condition(condition)
+        from_dialogue.add_choice(choice)
+        links.append(DialogueLink(to_dialogue, ConnectionKind.CHOICE))
+
+    def connect_conditional(self, from_node: str, to_node: str, condition: str = "True") -> None:
+        """Add a link that is only followed when condition holds"""
+        endpoints = self._link_endpoints(from_node, to_node)
+        if endpoints is None:
+            return
+        from_dialogue, to_dialogue, links = endpoints
+        # The text form is kept for display and validation, and is what gets saved
+        from_dialogue.conditions.append(f"{condition} -> {to_node}")
+        links.append(DialogueLink(to_dialogue, ConnectionKind.CONDITIONAL, compile_condition(condition)))
+
+    def neighbors(self, node_id: str) -> List[DialogueLink]:
+        """Outgoing links created for a node"""
+        return self._adjacency.get(node_id, [])
+
+    def remove_dialogue(self, node_id: str) -> bool:
+        """Remove a dialogue node and any links pointing at it"""
+        node = self.dialogues.pop(node_id, None)
+        if node is None:
+            return False
+
+        self._adjacency.pop(node_id, None)
+        for source_id, links in self._adjacency.items():
+            if any(link.target is node for link in links):
+                self._adjacency[source_id] = [link for link in links if link.target is not node]
+
+        self.mark_graph_changed()
+        return True
+
+    def iter_export(self, prune: bool = False) -> Iterator[Dict]:
+        """Yield dialogues in JSON format one record at a time, optionally skipping unreachable ones"""
+        keep = self._reachable_from_starts() if prune else None
         for dialogue in self.dialogues.values():
-            dialogue_data = {
+            if keep is not None and dialogue.id not in keep:
+                continue
+            line_data = _EXPORT_DISPATCH.get(type(dialogue), _export_base_line)(dialogue)
+            record = {
                 "id": dialogue.id,
                 "title": dialogue.title,
                 "position": dialogue.position,
-                "node_type": dialogue.node_type.value,
-
-                # Add port data
-                "ports": [
-                    {
-                        "id": port.id,
-                        "name": port.name,
-                        "port_type": port.port_type,
-                        "data_type": port.data_type,
-                        "connected_to": port.connected_to,
-                        "position": port.position,
-                        "connection_limit": port.connection_limit,
-                        "required": port.required
-                    }
-                    for port in dialogue.ports
-                ],
-
-                "lines": []
-            }
-
-            # Basic dialogue line
-            line_data = {
-                "speaker": getattr(dialogue, 'speaker', ''),
-                "text": getattr(dialogue, 'text', '')
+                "node_type": _NODE_TYPE_VALUES[dialogue.node_type],
+                "ports": _export_ports(dialogue),
+                "lines": [line_data]
             }
+            # Conditional links only live in the "condition -> target" entries, so save them when present
+            if dialogue.conditions:
+                record["conditions"] = list(dialogue.conditions)
+            yield record
 
-            # Add conditions if present
-            if hasattr(dialogue, 'display_condition') and dialogue.display_condition:
-                line_data["condition"] = dialogue.display_condition
-
-            if hasattr(dialogue, 'once_only') and dialogue.once_only:
-                line_data["once_only"] = True
-
-            # Add choices if they exist
-            if hasattr(dialogue, 'choices') and dialogue.choices:
-                line_data["choices"] = [
-                    {
-                        "text": choice.text,
-                        "next": choice.next,
-                        "condition": choice.condition,
-                        "required_resources": choice.required_resources,
-                        "state_changes": choice.state_changes,
-                        "reputation_changes": choice.reputation_changes
-                    }
-                    for choice in dialogue.choices
-                ]
-            elif hasattr(dialogue, 'next') and dialogue.next:
-                line_data["next"] = dialogue.next
-
-            # Add hub properties
-            if hasattr(dialogue, 'is_hub') and dialogue.is_hub:
-                line_data["is_hub"] = True
-                line_data["return_text"] = getattr(dialogue, 'hub_return_text', '')
-
-            # Add condition node properties
-            if dialogue.node_type == NodeType.CONDITION:
-                line_data["condition_check"] = getattr(dialogue, 'condition', '')
-                line_data["true_path"] = getattr(dialogue, 'true_path', '')
-                line_data["false_path"] = getattr(dialogue, 'false_path', '')
-
-            # Add state change properties
-            if dialogue.node_type == NodeType.STATE_CHANGE:
-                if hasattr(dialogue, 'state_changes'):
-                    line_data["state_changes"] = dialogue.state_changes
-                if hasattr(dialogue, 'reputation_changes'):
-                    line_data["reputation_changes"] = dialogue.reputation_changes
-
-            dialogue_data["lines"].append(line_data)
-            dialogues.append(dialogue_data)
-
-        return dialogues
-
-    def import_dialogues(self, dialogue_data: List[Dict]):
+    def export_dialogues(self, prune: bool = False) -> List[Dict]:
+        """Export enhanced dialogues to JSON format"""
+        return list(self.iter_export(prune))
+
+    def dump_dialogues(self, fp: TextIO, prune: bool = False) -> None:
+        """Write the exported dialogues to fp as a JSON array without building the full list"""
+        fp.write('[')
+        first = True
+        for record in self.iter_export(prune):
+            if not first:
+                fp.write(', ')
+            json.dump(record, fp, ensure_ascii=False, sort_keys=True)
+            first = False
+        fp.write(']')
+
+    def import_dialogues(self, dialogue_data: List[Dict]) -> None:
         """Import enhanced dialogues from JSON format"""
         self.dialogues.clear()
+        self._adjacency.clear()
+        missing_ports = 0
 
         for data in dialogue_data:
-            node_type = data.get("node_type", "dialogue")
-
-            if node_type == "condition":
-                node = ConditionNode(
-                    id=data["id"],
-                    title=data.get("title", "Condition"),
-                    position=data.get("position", (100, 100))
-                )
-                if "lines" in data and data["lines"]:
-                    line = data["lines"][0]
-                    node.condition = line.get("condition_check", "")
-                    node.true_path = line.get("true_path", "")
-                    node.false_path = line.get("false_path", "")
-            elif node_type == "merge":
-                node = MergeNode(
-                    id=data["id"],
-                    title=data.get("title", "Merge"),
-                    position=data.get("position", (100, 100))
-                )
-            elif node_type == "state_change":
-                node = StateChangeNode(
-                    id=data["id"],
-                    title=data.get("title", "State Change"),
-                    position=data.get("position", (100, 100))
-                )
-                if "lines" in data and data["lines"]:
-                    line = data["lines"][0]
-                    node.state_changes = line.get("state_changes", {})
-                    node.reputation_changes = line.get("reputation_changes", {})
-            else:
-                # Regular dialogue node
-                node = DialogueNode(
-                    id=data["id"],
-                    title=data.get("title", f"Dialogue: {data['id']}"),
-                    position=data.get("position", (100, 100))
-                )
-
-                if "lines" in data and data["lines"]:
-                    line = data["lines"][0]
-                    node.speaker = line.get("speaker", "")
-                    node.text = line.get("text", "")
-                    node.display_condition = line.get("condition", "")
-                    node.once_only = line.get("once_only", False)
-                    node.is_hub = line.get("is_hub", False)
-
-                    if node.is_hub:
-                        node.hub_return_text = line.get("return_text", "")
-
-                    if "choices" in line:
-                        for choice_data in line["choices"]:
-                            choice = DialogueChoice(
-                                text=choice_data.get("text", ""),
-                                next=choice_data.get("next", ""),
-                                condition=choice_data.get("condition", ""),
-                                required_resources=choice_data.get("required_resources", {}),
-                                state_changes=choice_data.get("state_changes", {}),
-                                reputation_changes=choice_data.get("reputation_changes", {})
-                            )
-                            node.choices.append(choice)
-                    elif "next" in line:
-                        node.next = line["next"]
-
-            # Restore ports if they exist in the saved data
-            if "ports" in data:
-                from node_system import Port
-                node.ports = []
-                for port_data in data["ports"]:
-                    port = Port(
-                        id=port_data["id"],  # Use saved port ID
-                        name=port_data["name"],
-                        port_type=port_data["port_type"],
-                        data_type=port_data["data_type"],
-                        connected_to=port_data.get("connected_to", []),
-                        position=port_data.get("position", (0, 0)),
-                        connection_limit=port_data.get("connection_limit", -1),
-                        required=port_data.get("required", False)
-                    )
-                    node.ports.append(port)
-                print(f"Restored {len(node.ports)} ports for node {node.title}")
-            else:
-                print(f"No port data found for node {node.title}, using default ports")
+            node_type = sys.intern(data.get("node_type", "dialogue"))
+            # Saved ports are restored by the constructor; nodes without them build their defaults
+            node = _IMPORT_DISPATCH.get(node_type, _import_dialogue)(data)
+            if "ports" not in data:
+                missing_ports += 1
+            if data.get("conditions"):
+                node.conditions = list(data["conditions"])
 
             # Update properties
             self._update_node_properties(node)
             self.dialogues[node.id] = node
 
+        logger.debug("DialogueManager: Imported %d dialogue nodes (%d with saved ports, %d using default ports)",
+                     len(self.dialogues), len(self.dialogues) - missing_ports, missing_ports)
+        self._rebuild_adjacency()
+        self.mark_graph_changed()
+
+    def _rebuild_adjacency(self) -> None:
+        """Recreate the resolved links from the saved next, choice, condition path and conditional fields"""
+        self._adjacency.clear()
+        dialogues = self.dialogues
+
+        for node_id, node in dialogues.items():
+            links = []
+            if isinstance(node, DialogueNode):
+                if node.next in dialogues:
+                    links.append(DialogueLink(dialogues[node.next], ConnectionKind.NEXT))
+                for choice in node.choices:
+                    if choice.next in dialogues:
+                        links.append(DialogueLink(dialogues[choice.next], ConnectionKind.CHOICE))
+            elif isinstance(node, ConditionNode):
+                # The false path is taken exactly when the node's condition fails
+                false_condition = compile_condition(f"not ({node.condition})") if node.condition.strip() else None
+                if node.true_path in dialogues:
+                    links.append(DialogueLink(dialogues[node.true_path], ConnectionKind.CONDITIONAL,
+                                              node.compiled_condition))
+                if node.false_path in dialogues:
+                    links.append(DialogueLink(dialogues[node.false_path], ConnectionKind.CONDITIONAL,
+                                              false_condition))
+            for entry in node.conditions:
+                condition, target_id = _split_conditional(entry)
+                if target_id in dialogues:
+                    links.append(DialogueLink(dialogues[target_id], ConnectionKind.CONDITIONAL,
+                                              compile_condition(condition)))
+            if links:
+                self._adjacency[node_id] = links
+
     @staticmethod
-    def _update_node_properties(node: BaseNode):
+    def _update_node_properties(node: BaseNode) -> None:
         """Update node properties for UI display"""
         if hasattr(node, 'speaker'):
             node.properties["speaker"] = node.speaker
@@ -438,8 +787,121 @@ class DialogueManager:
         if hasattr(node, 'display_condition'):
             node.properties["display_condition"] = node.display_condition
         if hasattr(node, 'state_changes'):
-            node.properties["state_changes"] = str(node.state_changes)
+            node.properties["state_changes"] = node.state_changes
+        if hasattr(node, 'reputation_changes'):
+            node.properties["reputation_changes"] = node.reputation_changes
 
-    def clear(self):
+    @staticmethod
+    def _compile_choice_predicate(choice: DialogueChoice) -> Callable[[DialogueContext], bool]:
+        """Fuse a choice's requirements into one short-circuiting check.
+
+        Terms run cheapest first: flag subset test, then resource comparisons,
+        then the condition expression.
+        """
+        flags = frozenset(choice.required_flags)
+        requirements = tuple(choice.required_resources.items())
+        code = choice.compiled_condition
+        condition_ok = not choice.condition.strip()  # Result when there is no valid code to run
+
+        def predicate(context: DialogueContext) -> bool:
+            if flags and not flags.issubset(context.flags):
+                return False
+            if requirements:
+                resources = context.resources
+                for resource, amount in requirements:
+                    if resources.get(resource, 0) < amount:
+                        return False
+            if code is None:
+                return condition_ok
+            return _run_condition(code, context.variables)
+
+        return predicate
+
+    def get_available_choices(self, node: DialogueNode, context: DialogueContext) -> List[DialogueChoice]:
+        """Return the choices on a node that the player can currently pick"""
+        available = []
+        for choice in node.choices:
+            predicate = choice._predicate
+            if predicate is None or not choice._predicate_is_current():
+                predicate = choice._predicate = self._compile_choice_predicate(choice)
+                choice._predicate_inputs = (choice.condition, choice.required_resources, choice.required_flags)
+            if predicate(context):
+                available.append(choice)
+        return available
+
+    @staticmethod
+    def _successors(node: BaseNode) -> Iterator[str]:
+        """Yield the ids a dialogue node can lead to, from the node's own fields"""
+        next_id = getattr(node, 'next', '')
+        if next_id:
+            yield next_id
+        for choice in getattr(node, 'choices', ()):
+            if choice.next:
+                yield choice.next
+        if isinstance(node, ConditionNode):
+            if node.true_path:
+                yield node.true_path
+            if node.false_path:
+                yield node.false_path
+        # Conditional links are recorded on the node too, so pruning never depends on the adjacency alone
+        for entry in node.conditions:
+            yield _split_conditional(entry)[1]
+
+    def reachable_from(self, start_id: str) -> FrozenSet[str]:
+        """Ids of all dialogues reachable from start_id (inclusive), memoized per graph version"""
+        key = (start_id, self._graph_version)
+        cached = self._reachable_cache.get(key)
+        if cached is not None:
+            return cached
+
+        reachable = set()
+        stack = [start_id]
+        while stack:
+            node_id = stack.pop()
+            if node_id in reachable:
+                continue
+            node = self.dialogues.get(node_id)
+            if node is None:
+                continue
+            reachable.add(node_id)
+            stack.extend(self._successors(node))
+            stack.extend(link.target.id for link in self._adjacency.get(node_id, ()))
+
+        result = frozenset(reachable)
+        self._reachable_cache[key] = result
+        return result
+
+    def _reachable_from_starts(self) -> Optional[Set[str]]:
+        """Ids reachable from any start dialogue, or None if the graph has no start dialogue"""
+        start_ids = [node_id for node_id, node in self.dialogues.items() if node.title == self.START_TITLE]
+        if not start_ids:
+            return None
+
+        reached: Set[str] = set()
+        for start_id in start_ids:
+            if start_id not in reached:
+                reached |= self.reachable_from(start_id)
+        return reached
+
+    def prune_unreachable(self) -> int:
+        """Remove dialogues that no start dialogue can reach; returns how many were removed"""
+        reached = self._reachable_from_starts()
+        if reached is None:
+            # Without an entry point every node would look dead
+            return 0
+
+        dead = [node_id for node_id in self.dialogues if node_id not in reached]
+        for node_id in dead:
+            del self.dialogues[node_id]
+            # Links out of reached nodes only point at reached nodes, so dropping sources is enough
+            self._adjacency.pop(node_id, None)
+
+        if dead:
+            self.mark_graph_changed()
+        return len(dead)
+
+    def clear(self) -> None:
         """Clear all dialogues"""
         self.dialogues.clear()
+        self._adjacency.clear()
+        self.mark_graph_changed()
@@ -6,12 +6,12 @@ import json
 import os
 from pathlib import Path
 
-from node_system import NodeManager, BaseNode
+from node_system import NodeManager
 from dialogue_system import DialogueManager
 from quest_system import QuestManager
 from viewport import NodeViewport
 from hierarchy_panel import HierarchyPanel
-from properties_panel import PropertiesPanel
+from properties_panel import PropertiesPanel, PROPERTY_DELETED
 from dialogs import TemplateDialog, ValidationDialog
 from file_manager import FileManager
 
@@ -574,9 +574,12 @@ class QuestDialogueEditor:
             node.color = new_color
             print(f"Updated {node.title} ({node_type}) to color {new_color}")
 
-    def _on_node_changed(self, action: str, node: BaseNode):
-        """Handle node changes"""
-        print(f"Node {action}: {node.title} ({node.id})")
+    def _on_node_changed(self, action: str, node):
+        """Handle node changes; node is a list of nodes for 'bulk_add'"""
+        if action == "bulk_add":
+            print(f"Node {action}: {len(node)} nodes")
+        else:
+            print(f"Node {action}: {node.title} ({node.id})")
         self.hierarchy_panel.refresh()
         self.viewport.refresh()
 
@@ -636,12 +639,10 @@ class QuestDialogueEditor:
                 self.viewport.set_selected_node(None)
 
             # Remove from specialized managers
-            if node_id in self.dialogue_manager.dialogues:
-                del self.dialogue_manager.dialogues[node_id]
+            if self.dialogue_manager.remove_dialogue(node_id):
                 print(f"Editor: Removed from dialogue manager: {node_id}")
 
-            if node_id in self.quest_manager.quests:
-                del self.quest_manager.quests[node_id]
+            if self.quest_manager.remove_quest(node_id):
                 print(f"Editor: Removed from quest manager: {node_id}")
 
             if node_id in self.quest_manager.objectives:
@@ -680,7 +681,11 @@ class QuestDialogueEditor:
         """Handle property changes"""
         node = self.node_manager.get_node(node_id)
         if node:
-            node.set_property(property_name, value)
+            # Deleted properties are already gone from the node; only the views need updating
+            if value is not PROPERTY_DELETED:
+                node.set_property(property_name, value)
+            if node_id in self.dialogue_manager.dialogues:
+                self.dialogue_manager.mark_graph_changed()
             # Trigger node size recalculation
             node.needs_resize = True
             self.hierarchy_panel.refresh()
@@ -847,12 +852,16 @@ class QuestDialogueEditor:
         if os.path.exists(quest_file):
             quest_data = self.file_manager.load_json(quest_file)
             if quest_data and "quests" in quest_data:
-                self.quest_manager.import_quests(quest_data["quests"])
+                try:
+                    self.quest_manager.import_quests(quest_data["quests"])
+                except ValueError as e:
+                    print(f"Editor: Failed to load project: {e}")
+                    return
                 for quest in self.quest_manager.quests.values():
                     # Set theme-appropriate color for loaded nodes
                     theme_color = self.get_node_color(quest.node_type.value)
                     quest.color = theme_color
-                    self.node_manager.add_node(quest)
+                self.node_manager.add_nodes(self.quest_manager.quests.values())
 
         if os.path.exists(dialogue_file):
             dialogue_data = self.file_manager.load_json(dialogue_file)
@@ -862,7 +871,7 @@ class QuestDialogueEditor:
                     # Set theme-appropriate color for loaded nodes
                     theme_color = self.get_node_color(dialogue.node_type.value)
                     dialogue.color = theme_color
-                    self.node_manager.add_node(dialogue)
+                self.node_manager.add_nodes(self.dialogue_manager.dialogues.values())
 
         # Load connections after nodes are loaded
         if os.path.exists(connections_file):
@@ -1056,6 +1065,11 @@ class QuestDialogueEditor:
                 node.state_changes = {"gold": -10, "has_talked_to_npc": True}
                 node.reputation_changes = {"village": 5}
 
+            # Templates may have replaced choices or paths
+            if hasattr(node, 'rebuild_choice_index'):
+                node.rebuild_choice_index()
+            self.dialogue_manager.mark_graph_changed()
+
             # Update properties dictionary for all templates
             node.properties.update({
                 "title": node.title,
@@ -1069,9 +1083,9 @@ class QuestDialogueEditor:
                 "true_path": getattr(node, 'true_path', ''),
                 "false_path": getattr(node, 'false_path', ''),
                 "merge_text": getattr(node, 'merge_text', ''),
-                "state_changes": str(getattr(node, 'state_changes', {})),
-                "reputation_changes": str(getattr(node, 'reputation_changes', {})),
-                "required_resources": str(getattr(node, 'required_resources', {}))
+                "state_changes": getattr(node, 'state_changes', {}),
+                "reputation_changes": getattr(node, 'reputation_changes', {}),
+                "required_resources": getattr(node, 'required_resources', {})
             })
 
         else:  # Quest mode
@@ -1121,7 +1135,7 @@ class QuestDialogueEditor:
             elif template_id == "branching_quest":
                 node.title = "Branching Quest"
                 node.description = "A quest with multiple possible paths."
-                node.branches = {"path_a": ["objective_a"], "path_b": ["objective_b"]}
+                node.branches = {"path_a": ("objective_a",), "path_b": ("objective_b",)}
 
             elif template_id == "timed_quest":
                 node.title = "Timed Quest"
@@ -1,9 +1,17 @@
+from collections import Counter
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set, TextIO, Tuple, Any
 from enum import Enum
+from functools import lru_cache
+import json
+import logging
+import sys
 import uuid
+from types import CodeType, MappingProxyType
 import pygame
 
+logger = logging.getLogger(__name__)
+
 
 class NodeType(Enum):
     DIALOGUE = "dialogue"
@@ -31,21 +39,138 @@ class ConnectionType(Enum):
     STATE_CHANGE = "state_change"
 
 
-@dataclass
+# Connection types that make the target wait on the source
+DEPENDENCY_TYPES = frozenset((ConnectionType.PREREQUISITE, ConnectionType.DEPENDENCY))
+
+# Saved connection type strings to members, skipping the Enum call machinery on import
+_CONNECTION_TYPES = {member.value: member for member in ConnectionType}
+
+
+def new_id() -> str:
+    """Random id for nodes, ports and connections; globally unique so ids from saved projects never collide"""
+    return uuid.uuid4().hex
+
+
+# Sentinel for lookups where None is a legitimate stored value
+_MISSING = object()
+
+# Most connections and choices carry no requirements or side effects; they all share these read-only empties
+_EMPTY_DICT: Mapping[str, Any] = MappingProxyType({})
+_EMPTY_TUPLE: Tuple[str, ...] = ()
+
+
+def _empty_mapping() -> Mapping[str, Any]:
+    """Default factory handing out the shared empty mapping"""
+    return _EMPTY_DICT
+
+
+def _writable(mapping: Mapping[str, Any]) -> Dict[str, Any]:
+    """The mapping itself if it is a plain dict, otherwise a dict copy that can be written to"""
+    return mapping if isinstance(mapping, dict) else dict(mapping)
+
+
+@lru_cache(maxsize=None)
+def compile_condition(expression: str) -> Optional[CodeType]:
+    """Compile a condition expression once; identical strings share one code object"""
+    expression = expression.strip()
+    if not expression:
+        return None
+    try:
+        return compile(expression, '<condition>', 'eval')
+    except SyntaxError:
+        return None
+
+
+def _run_condition(code: CodeType, context: Dict[str, Any]) -> bool:
+    """Evaluate a compiled condition; runtime errors count as a failed check"""
+    try:
+        return bool(eval(code, {"__builtins__": {}}, context))
+    except Exception:
+        return False
+
+
+def evaluate_condition(expression: str, context: Dict[str, Any]) -> bool:
+    """Evaluate a condition string against game state (empty conditions always pass)"""
+    code = compile_condition(expression)
+    if code is None:
+        return not expression.strip()
+    return _run_condition(code, context)
+
+
+# Minimum (width, height) of a node by type
+_MIN_NODE_DIMS = {
+    NodeType.HUB: (250, 150),
+    NodeType.CHOICE: (250, 150),
+    NodeType.CONDITION: (200, 120)
+}
+_DEFAULT_MIN_NODE_DIMS = (180, 100)
+
+
+@lru_cache(maxsize=256)
+def _port_offsets(count: int, height: int) -> Tuple[int, ...]:
+    """Y offsets for count ports spread over a node of the given height"""
+    if count <= 1:
+        # A lone port is centred
+        return (height // 2,) * count
+    start_y = 40
+    y_step = (height - 80) / (count - 1)
+    return tuple(int(start_y + i * y_step) for i in range(count))
+
+
+@lru_cache(maxsize=1024)
+def _measure_text_width(font: pygame.font.Font, text: str) -> int:
+    """Rendered width of text in font, measured without allocating a Surface"""
+    return font.size(text)[0]
+
+
+@dataclass(slots=True)
 class Port:
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=new_id)
     name: str = ""
     port_type: str = ""  # "input" or "output"
     data_type: str = ""  # "dialogue", "quest", "condition", etc.
-    connected_to: List[str] = field(default_factory=list)
+    connected_to: Counter[str] = field(default_factory=Counter)  # Ports on the other end, by live connection count
     position: Tuple[int, int] = (0, 0)  # Relative to node
     connection_limit: int = -1  # -1 for unlimited, or specific number
     required: bool = False  # If this port must be connected
 
+    def __post_init__(self):
+        # Port labels come from a tiny vocabulary; share one string object per value
+        self.name = sys.intern(self.name)
+        self.port_type = sys.intern(self.port_type)
+        self.data_type = sys.intern(self.data_type)
+        # Saved projects store links as JSON lists, one entry per connection
+        if not isinstance(self.connected_to, Counter):
+            self.connected_to = Counter(self.connected_to)
+
+    def link(self, port_id: str) -> None:
+        """Record one more connection to port_id"""
+        self.connected_to[port_id] += 1
+
+    def unlink(self, port_id: str) -> None:
+        """Drop one connection to port_id, forgetting the port once no connection to it is left"""
+        remaining = self.connected_to[port_id] - 1
+        if remaining > 0:
+            self.connected_to[port_id] = remaining
+        else:
+            self.connected_to.pop(port_id, None)
+
+
+class PortSpec(NamedTuple):
+    """Immutable port layout entry shared by every node built from it"""
+    name: str
+    port_type: str
+    data_type: str
+
+
+def _ports_from_spec(spec: Tuple[PortSpec, ...]) -> List[Port]:
+    """Instantiate fresh ports from a shared layout; only id, links and position are per-port"""
+    return [Port(name=ps.name, port_type=ps.port_type, data_type=ps.data_type) for ps in spec]
+
 
-@dataclass
+@dataclass(slots=True)
 class Connection:
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=new_id)
     from_node: str = ""
     to_node: str = ""
     from_port: str = ""
@@ -57,21 +182,44 @@ class Connection:
     priority: int = 0  # For multiple conditions, check in priority order
 
     # Resource/state requirements
-    required_resources: Dict[str, int] = field(default_factory=dict)  # {"gold": 100, "level": 5}
-    required_flags: List[str] = field(default_factory=list)  # ["quest_completed", "has_key"]
-    required_reputation: Dict[str, int] = field(default_factory=dict)  # {"guards": 10, "thieves": -5}
+    required_resources: Mapping[str, int] = field(default_factory=_empty_mapping)  # {"gold": 100, "level": 5}
+    required_flags: Sequence[str] = _EMPTY_TUPLE  # ["quest_completed", "has_key"]
+    required_reputation: Mapping[str, int] = field(default_factory=_empty_mapping)  # {"guards": 10, "thieves": -5}
 
     # Time-based properties
     time_condition: str = ""  # "day", "night", "after:1800", "before:0600"
 
     # State changes this connection triggers
-    state_changes: Dict[str, Any] = field(default_factory=dict)  # {"gold": -50, "has_key": True}
-    reputation_changes: Dict[str, int] = field(default_factory=dict)  # {"guards": 5}
+    state_changes: Mapping[str, Any] = field(default_factory=_empty_mapping)  # {"gold": -50, "has_key": True}
+    reputation_changes: Mapping[str, int] = field(default_factory=_empty_mapping)  # {"guards": 5}
 
 
-@dataclass
+def _port_from_dict(pd: Dict) -> Port:
+    """Rebuild a saved port, keeping its saved ID"""
+    return Port(pd["id"], pd["name"], pd["port_type"], pd["data_type"],
+                Counter(pd.get("connected_to", ())), pd.get("position", (0, 0)),
+                pd.get("connection_limit", -1), pd.get("required", False))
+
+
+def _saved_ports(data: Dict) -> List[Port]:
+    """Ports restored from a saved node; empty when none were saved, so the node builds its default ports"""
+    return [_port_from_dict(pd) for pd in data.get("ports", ())]
+
+
+def _connection_from_dict(data: Dict, connection_type: ConnectionType) -> Connection:
+    """Rebuild a saved connection, passing every field positionally so no defaults are evaluated"""
+    get = data.get
+    return Connection(get("id") or new_id(), data["from_node"], data["to_node"],
+                      data["from_port"], data["to_port"], connection_type,
+                      get("condition", ""), get("priority", 0),
+                      get("required_resources") or _EMPTY_DICT, get("required_flags") or _EMPTY_TUPLE,
+                      get("required_reputation") or _EMPTY_DICT, get("time_condition", ""),
+                      get("state_changes") or _EMPTY_DICT, get("reputation_changes") or _EMPTY_DICT)
+
+
+@dataclass(slots=True)
 class BaseNode:
-    id: str = field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=new_id)
     node_type: NodeType = NodeType.DIALOGUE
     title: str = ""
     position: Tuple[int, int] = (0, 0)
@@ -88,9 +236,57 @@ class BaseNode:
     required_flags: List[str] = field(default_factory=list)
     state_changes: Dict[str, Any] = field(default_factory=dict)  # What this node changes when executed
 
+    # Port lookup by id and by side; rebuilt on demand when self.ports is replaced or resized
+    ports_by_id: Dict[str, Port] = field(default_factory=dict, init=False, repr=False, compare=False)
+    input_ports: List[Port] = field(default_factory=list, init=False, repr=False, compare=False)
+    output_ports: List[Port] = field(default_factory=list, init=False, repr=False, compare=False)
+    # The list ports_by_id was built from; a factory default so non-slotted subclasses still initialise the slot
+    _indexed_ports: List[Port] = field(default_factory=list, init=False, repr=False, compare=False)
+
+    def add_port(self, port: Port):
+        """Append a port and keep the port indices current"""
+        indexed = self._indexed_ports is self.ports and len(self.ports_by_id) == len(self.ports)
+        self.ports.append(port)
+        if indexed:
+            self.ports_by_id[port.id] = port
+            if port.port_type == "input":
+                self.input_ports.append(port)
+            elif port.port_type == "output":
+                self.output_ports.append(port)
+
+    def rebuild_port_index(self):
+        """Re-index self.ports by id and split them into input_ports and output_ports"""
+        ports_by_id = {}
+        input_ports = []
+        output_ports = []
+        for port in self.ports:
+            ports_by_id[port.id] = port
+            if port.port_type == "input":
+                input_ports.append(port)
+            elif port.port_type == "output":
+                output_ports.append(port)
+        self.ports_by_id = ports_by_id
+        self.input_ports = input_ports
+        self.output_ports = output_ports
+        self._indexed_ports = self.ports
+
+    def _ensure_port_index(self):
+        """Rebuild the port indices if self.ports was replaced or changed length since the last build"""
+        if self._indexed_ports is not self.ports or len(self.ports_by_id) != len(self.ports):
+            self.rebuild_port_index()
+
+    def get_port(self, port_id: str) -> Optional[Port]:
+        """Find one of this node's ports by id"""
+        self._ensure_port_index()
+        return self.ports_by_id.get(port_id)
+
     def get_property(self, key: str, default=None):
         """Get a property value with default"""
-        return self.properties.get(key, getattr(self, key, default))
+        value = self.properties.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        # Only fall back to the attribute when the properties dict has no entry
+        return getattr(self, key, default)
 
     def set_property(self, key: str, value):
         """Set a property value"""
@@ -105,19 +301,10 @@ class BaseNode:
             return self.size
 
         # Minimum dimensions based on node type
-        min_width = 180
-        min_height = 100
-
-        if self.node_type in [NodeType.HUB, NodeType.CHOICE]:
-            min_width = 250
-            min_height = 150
-        elif self.node_type == NodeType.CONDITION:
-            min_width = 200
-            min_height = 120
+        min_width, min_height = _MIN_NODE_DIMS.get(self.node_type, _DEFAULT_MIN_NODE_DIMS)
 
         # Calculate title size
-        title_surface = font.render(self.title, True, (255, 255, 255))
-        title_width = title_surface.get_width() + 40
+        title_width = _measure_text_width(font, self.title) + 40
 
         # Calculate content height based on visible properties
         content_height = 50  # header space + padding
@@ -147,8 +334,8 @@ class BaseNode:
             content_height += line_height
 
         # Add space for ports
-        port_space = max(len([p for p in self.ports if p.port_type == "input"]),
-                         len([p for p in self.ports if p.port_type == "output"])) * 30
+        input_ports, output_ports = self._partition_ports()
+        port_space = max(len(input_ports), len(output_ports)) * 30
         content_height = max(content_height, port_space + 60)
 
         # Calculate final size
@@ -159,48 +346,66 @@ class BaseNode:
         self.needs_resize = False
 
         # Update port positions after size calculation
-        self._update_port_positions()
+        self._update_port_positions(input_ports, output_ports)
 
         return self.size
 
-    def _update_port_positions(self):
-        """Update port positions relative to node"""
-        input_ports = [p for p in self.ports if p.port_type == "input"]
-        output_ports = [p for p in self.ports if p.port_type == "output"]
-
-        # Position input ports on the left side
-        if input_ports:
-            start_y = 40
-            available_height = self.size[1] - 80
-            if len(input_ports) > 1:
-                y_step = available_height / (len(input_ports) - 1)
-            else:
-                y_step = 0
-
-            for i, port in enumerate(input_ports):
-                y_pos = start_y + (i * y_step) if len(input_ports) > 1 else self.size[1] // 2
-                port.position = (-8, int(y_pos))
-
-        # Position output ports on the right side
-        if output_ports:
-            start_y = 40
-            available_height = self.size[1] - 80
-            if len(output_ports) > 1:
-                y_step = available_height / (len(output_ports) - 1)
-            else:
-                y_step = 0
+    def _partition_ports(self) -> Tuple[List[Port], List[Port]]:
+        """The cached (inputs, outputs) split of self.ports"""
+        self._ensure_port_index()
+        return self.input_ports, self.output_ports
 
-            for i, port in enumerate(output_ports):
-                y_pos = start_y + (i * y_step) if len(output_ports) > 1 else self.size[1] // 2
-                port.position = (self.size[0] + 8, int(y_pos))
+    def _update_port_positions(self, input_ports: Optional[List[Port]] = None,
+                               output_ports: Optional[List[Port]] = None):
+        """Update port positions relative to node"""
+        if input_ports is None or output_ports is None:
+            input_ports, output_ports = self._partition_ports()
+
+        # Inputs sit on the left edge, outputs on the right, spread evenly down the node
+        height = self.size[1]
+        for port, y_pos in zip(input_ports, _port_offsets(len(input_ports), height)):
+            port.position = (-8, y_pos)
+        out_x = self.size[0] + 8
+        for port, y_pos in zip(output_ports, _port_offsets(len(output_ports), height)):
+            port.position = (out_x, y_pos)
+
+
+def _export_ports(node: BaseNode) -> List[Dict]:
+    """Serialize a node's ports"""
+    return [
+        {
+            "id": port.id,
+            "name": port.name,
+            "port_type": port.port_type,
+            "data_type": port.data_type,
+            "connected_to": sorted(port.connected_to.elements()),
+            "position": port.position,
+            "connection_limit": port.connection_limit,
+            "required": port.required
+        }
+        for port in node.ports
+    ]
 
 
 class NodeManager:
+    __slots__ = ('nodes', 'connections', 'next_id', 'out_adj', 'in_adj', 'prereq_in', 'prereq_out',
+                 'dependency_version', '_cycles_cache', 'on_node_changed', 'on_connection_changed')
+
     def __init__(self):
         self.nodes: Dict[str, BaseNode] = {}
         self.connections: Dict[str, Connection] = {}
         self.next_id = 1
 
+        # Connection ids by source node and by target node
+        self.out_adj: Dict[str, List[str]] = {}
+        self.in_adj: Dict[str, List[str]] = {}
+        # Prerequisite/dependency edges as node ids: sources by target, and targets by source
+        self.prereq_in: Dict[str, List[str]] = {}
+        self.prereq_out: Dict[str, List[str]] = {}
+        # Bumped whenever the nodes or dependency edges change; keys the cached cycle search
+        self.dependency_version = 0
+        self._cycles_cache: Optional[Tuple[int, List[List[str]]]] = None
+
         # Callbacks for UI updates
         self.on_node_changed = None
         self.on_connection_changed = None
@@ -211,38 +416,75 @@ class NodeManager:
             self.next_id += 1
 
         self.nodes[node.id] = node
-        print(f"NodeManager: Added node {node.id} - {node.title}")
+        self.dependency_version += 1
+        logger.debug("NodeManager: Added node %s - %s", node.id, node.title)
         if self.on_node_changed:
             self.on_node_changed("add", node)
         return node
 
+    def add_nodes(self, nodes: Iterable[BaseNode]) -> List[BaseNode]:
+        """Add many nodes at once, firing a single "bulk_add" change with the list of added nodes"""
+        added = []
+        for node in nodes:
+            if not node.id:
+                node.id = f"node_{self.next_id}"
+                self.next_id += 1
+            self.nodes[node.id] = node
+            added.append(node)
+        self.dependency_version += 1
+
+        logger.debug("NodeManager: Added %d nodes", len(added))
+        if self.on_node_changed and added:
+            self.on_node_changed("bulk_add", added)
+        return added
+
     def remove_node(self, node_id: str) -> bool:
         """Remove a node and all its connections"""
         if node_id not in self.nodes:
-            print(f"NodeManager: Node {node_id} not found for removal")
+            logger.warning("NodeManager: Node %s not found for removal", node_id)
             return False
 
         node = self.nodes[node_id]
-        print(f"NodeManager: Removing node {node_id} - {node.title}")
+        logger.debug("NodeManager: Removing node %s - %s", node_id, node.title)
 
-        # Remove all connections involving this node
-        connections_to_remove = [
-            conn_id for conn_id, conn in self.connections.items()
-            if conn.from_node == node_id or conn.to_node == node_id
-        ]
+        # Remove all connections involving this node (a self-loop is listed on both sides)
+        connections_to_remove = dict.fromkeys(self.out_adj.get(node_id, []) + self.in_adj.get(node_id, []))
 
         for conn_id in connections_to_remove:
-            print(f"NodeManager: Removing connection {conn_id}")
-            del self.connections[conn_id]
+            logger.debug("NodeManager: Removing connection %s", conn_id)
+            self._unindex_connection(self.connections.pop(conn_id))
+        self.out_adj.pop(node_id, None)
+        self.in_adj.pop(node_id, None)
+        self.prereq_in.pop(node_id, None)
+        self.prereq_out.pop(node_id, None)
 
         # Remove the node
         del self.nodes[node_id]
-        print(f"NodeManager: Successfully removed node {node_id}")
+        self.dependency_version += 1
+        logger.debug("NodeManager: Successfully removed node %s", node_id)
 
         if self.on_node_changed:
             self.on_node_changed("remove", node)
         return True
 
+    def _index_connection(self, connection: Connection):
+        """Add a connection to the adjacency indices"""
+        self.out_adj.setdefault(connection.from_node, []).append(connection.id)
+        self.in_adj.setdefault(connection.to_node, []).append(connection.id)
+        if connection.connection_type in DEPENDENCY_TYPES:
+            self.prereq_in.setdefault(connection.to_node, []).append(connection.from_node)
+            self.prereq_out.setdefault(connection.from_node, []).append(connection.to_node)
+            self.dependency_version += 1
+
+    def _unindex_connection(self, connection: Connection):
+        """Drop a connection from the adjacency indices"""
+        self.out_adj[connection.from_node].remove(connection.id)
+        self.in_adj[connection.to_node].remove(connection.id)
+        if connection.connection_type in DEPENDENCY_TYPES:
+            self.prereq_in[connection.to_node].remove(connection.from_node)
+            self.prereq_out[connection.from_node].remove(connection.to_node)
+            self.dependency_version += 1
+
     def get_node(self, node_id: str) -> Optional[BaseNode]:
         return self.nodes.get(node_id)
 
@@ -261,16 +503,16 @@ class NodeManager:
             return None
 
         # Find the ports
-        from_port = next((p for p in from_node.ports if p.id == from_port_id), None)
-        to_port = next((p for p in to_node.ports if p.id == to_port_id), None)
+        from_port = from_node.get_port(from_port_id)
+        to_port = to_node.get_port(to_port_id)
 
         if not from_port or not to_port:
             return None
 
         # Check connection limits
-        # if from_port.connection_limit > 0 and len(from_port.connected_to) >= from_port.connection_limit:
-        if 0 < from_port.connection_limit <= len(from_port.connected_to):
-            print(f"Port {from_port.name} has reached its connection limit")
+        # if from_port.connection_limit > 0 and number of connections >= from_port.connection_limit:
+        if 0 < from_port.connection_limit <= from_port.connected_to.total():
+            logger.warning("Port %s has reached its connection limit", from_port.name)
             return None
 
         # Create connection with enhanced properties
@@ -284,10 +526,11 @@ class NodeManager:
         )
 
         self.connections[connection.id] = connection
+        self._index_connection(connection)
 
         # Update port connections
-        from_port.connected_to.append(to_port_id)
-        to_port.connected_to.append(from_port_id)
+        from_port.link(to_port_id)
+        to_port.link(from_port_id)
 
         if self.on_connection_changed:
             self.on_connection_changed("add", connection)
@@ -297,26 +540,27 @@ class NodeManager:
     def remove_connection(self, connection_id: str) -> bool:
         """Remove a connection"""
         if connection_id not in self.connections:
-            print(f"NodeManager: Connection {connection_id} not found for removal")
+            logger.warning("NodeManager: Connection %s not found for removal", connection_id)
             return False
 
         connection = self.connections[connection_id]
-        print(f"NodeManager: Removing connection {connection_id}")
+        logger.debug("NodeManager: Removing connection %s", connection_id)
 
         # Update port connections
         from_node = self.get_node(connection.from_node)
         to_node = self.get_node(connection.to_node)
 
         if from_node and to_node:
-            from_port = next((p for p in from_node.ports if p.id == connection.from_port), None)
-            to_port = next((p for p in to_node.ports if p.id == connection.to_port), None)
+            from_port = from_node.get_port(connection.from_port)
+            to_port = to_node.get_port(connection.to_port)
 
-            if from_port and connection.to_port in from_port.connected_to:
-                from_port.connected_to.remove(connection.to_port)
-            if to_port and connection.from_port in to_port.connected_to:
-                to_port.connected_to.remove(connection.from_port)
+            if from_port:
+                from_port.unlink(connection.to_port)
+            if to_port:
+                to_port.unlink(connection.from_port)
 
         del self.connections[connection_id]
+        self._unindex_connection(connection)
 
         if self.on_connection_changed:
             self.on_connection_changed("remove", connection)
@@ -325,88 +569,93 @@ class NodeManager:
 
     def validate_connection_path(self, start_node_id: str, end_node_id: str) -> List[str]:
         """Check if there's a valid path between nodes considering conditions"""
-        visited = set()
-        path = []
-
-        def dfs(current_id: str, target_id: str, current_path: List[str]) -> bool:
-            if current_id == target_id:
-                path.extend(current_path + [current_id])
-                return True
-
-            if current_id in visited:
-                return False
-
-            visited.add(current_id)
-
-            # Check all outgoing connections
-            for conn in self.connections.values():
-                if conn.from_node == current_id:
-                    if dfs(conn.to_node, target_id, current_path + [current_id]):
-                        return True
-
-            return False
+        if start_node_id == end_node_id:
+            return [start_node_id]
+
+        # Iterative DFS over one shared path; edge_stack[i] holds the unexplored edges of path[i]
+        visited = {start_node_id}
+        path = [start_node_id]
+        edge_stack = [iter(self.out_adj.get(start_node_id, ()))]
+
+        while edge_stack:
+            for conn_id in edge_stack[-1]:
+                next_id = self.connections[conn_id].to_node
+                if next_id == end_node_id:
+                    path.append(next_id)
+                    return path
+                if next_id not in visited:
+                    visited.add(next_id)
+                    path.append(next_id)
+                    edge_stack.append(iter(self.out_adj.get(next_id, ())))
+                    break
+            else:
+                edge_stack.pop()
+                path.pop()
 
-        if dfs(start_node_id, end_node_id, []):
-            return path
         return []
 
     def get_prerequisites(self, node_id: str) -> List[str]:
         """Get all prerequisite nodes for a given node"""
-        prerequisites = []
-        for conn in self.connections.values():
-            if (conn.to_node == node_id and
-                    conn.connection_type in [ConnectionType.PREREQUISITE, ConnectionType.DEPENDENCY]):
-                prerequisites.append(conn.from_node)
-        return prerequisites
+        return list(self.prereq_in.get(node_id, ()))
 
     def detect_circular_dependencies(self) -> List[List[str]]:
-        """Detect circular dependencies in the node graph"""
+        """Detect circular dependencies in the node graph
+
+        The result is cached until a node or dependency connection changes, so repeated
+        validation passes over an unchanged graph skip the search.
+        """
+        cache = self._cycles_cache
+        if cache is None or cache[0] != self.dependency_version:
+            cache = self._cycles_cache = (self.dependency_version, self._find_cycles())
+        return [list(cycle) for cycle in cache[1]]
+
+    def _find_cycles(self) -> List[List[str]]:
+        """Depth-first search over the dependency edges, returning each cycle closed by a back edge"""
         cycles = []
-        visited = set()
-        rec_stack = set()
-
-        def has_cycle(temp_node_id: str, path: List[str]) -> bool:
-            if temp_node_id in rec_stack:
-                # Found a cycle, extract the cycle from the path
-                cycle_start = path.index(temp_node_id)
-                cycles.append(path[cycle_start:] + [temp_node_id])
-                return True
-
-            if temp_node_id in visited:
-                return False
-
-            visited.add(temp_node_id)
-            rec_stack.add(temp_node_id)
-
-            # Check all outgoing prerequisite/dependency connections
-            for conn in self.connections.values():
-                if (conn.from_node == temp_node_id and
-                        conn.connection_type in [ConnectionType.PREREQUISITE, ConnectionType.DEPENDENCY]):
-                    if has_cycle(conn.to_node, path + [temp_node_id]):
-                        return True
-
-            rec_stack.remove(temp_node_id)
-            return False
-
-        for node_id in self.nodes:
-            if node_id not in visited:
-                has_cycle(node_id, [])
+        finished: Set[str] = set()
+        # Index of each node on the current DFS path; an edge back to one of these closes a cycle
+        on_path: Dict[str, int] = {}
+
+        for root_id in self.nodes:
+            if root_id in finished:
+                continue
+
+            path = [root_id]
+            on_path[root_id] = 0
+            edge_stack = [iter(self.prereq_out.get(root_id, ()))]
+            while edge_stack:
+                for next_id in edge_stack[-1]:
+                    if next_id in on_path:
+                        cycles.append(path[on_path[next_id]:] + [next_id])
+                    elif next_id not in finished:
+                        on_path[next_id] = len(path)
+                        path.append(next_id)
+                        edge_stack.append(iter(self.prereq_out.get(next_id, ())))
+                        break
+                else:
+                    edge_stack.pop()
+                    node_id = path.pop()
+                    del on_path[node_id]
+                    finished.add(node_id)
 
         return cycles
 
     def clear(self):
         """Clear all nodes and connections"""
-        print("NodeManager: Clearing all nodes and connections")
+        logger.debug("NodeManager: Clearing all nodes and connections")
         self.nodes.clear()
         self.connections.clear()
+        self.out_adj.clear()
+        self.in_adj.clear()
+        self.prereq_in.clear()
+        self.prereq_out.clear()
+        self.dependency_version += 1
         self.next_id = 1
 
-    def export_connections(self) -> List[Dict]:
-        """Export connections to JSON format"""
-        connections = []
-
+    def iter_export_connections(self) -> Iterator[Dict]:
+        """Yield connections in JSON format one record at a time"""
         for connection in self.connections.values():
-            connection_data = {
+            yield {
                 "id": connection.id,
                 "from_node": connection.from_node,
                 "to_node": connection.to_node,
@@ -415,79 +664,85 @@ class NodeManager:
                 "connection_type": connection.connection_type.value,
                 "condition": connection.condition,
                 "priority": connection.priority,
-                "required_resources": connection.required_resources,
-                "required_flags": connection.required_flags,
-                "required_reputation": connection.required_reputation,
+                "required_resources": _writable(connection.required_resources),
+                "required_flags": list(connection.required_flags),
+                "required_reputation": _writable(connection.required_reputation),
                 "time_condition": connection.time_condition,
-                "state_changes": connection.state_changes,
-                "reputation_changes": connection.reputation_changes
+                "state_changes": _writable(connection.state_changes),
+                "reputation_changes": _writable(connection.reputation_changes)
             }
-            connections.append(connection_data)
 
-        return connections
+    def export_connections(self) -> List[Dict]:
+        """Export connections to JSON format"""
+        return list(self.iter_export_connections())
+
+    def dump_connections(self, fp: TextIO) -> None:
+        """Write the exported connections to fp as a JSON array without building the full list"""
+        fp.write('[')
+        first = True
+        for record in self.iter_export_connections():
+            if not first:
+                fp.write(', ')
+            json.dump(record, fp, ensure_ascii=False, sort_keys=True)
+            first = False
+        fp.write(']')
 
     def import_connections(self, connections_data: List[Dict]):
         """Import connections from JSON format"""
         # Clear existing connections
         self.connections.clear()
+        self.out_adj.clear()
+        self.in_adj.clear()
+        self.prereq_in.clear()
+        self.prereq_out.clear()
+        self.dependency_version += 1
+        # Per-connection messages are skipped entirely unless debug logging is on
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         for data in connections_data:
             try:
                 # Get connection type enum
                 connection_type_str = data.get("connection_type", "simple")
-                try:
-                    connection_type = ConnectionType(connection_type_str)
-                except ValueError:
-                    print(f"Unknown connection type: {connection_type_str}, using SIMPLE")
+                connection_type = _CONNECTION_TYPES.get(connection_type_str)
+                if connection_type is None:
+                    logger.warning("Unknown connection type: %s, using SIMPLE", connection_type_str)
                     connection_type = ConnectionType.SIMPLE
 
-                connection = Connection(
-                    id=data.get("id", str(uuid.uuid4())),
-                    from_node=data["from_node"],
-                    to_node=data["to_node"],
-                    from_port=data["from_port"],
-                    to_port=data["to_port"],
-                    connection_type=connection_type,
-                    condition=data.get("condition", ""),
-                    priority=data.get("priority", 0),
-                    required_resources=data.get("required_resources", {}),
-                    required_flags=data.get("required_flags", []),
-                    required_reputation=data.get("required_reputation", {}),
-                    time_condition=data.get("time_condition", ""),
-                    state_changes=data.get("state_changes", {}),
-                    reputation_changes=data.get("reputation_changes", {})
-                )
+                connection = _connection_from_dict(data, connection_type)
 
+                if connection.id in self.connections:
+                    self._unindex_connection(self.connections[connection.id])
                 self.connections[connection.id] = connection
-                print(f"Imported connection: {connection.from_node} -> {connection.to_node}")
+                self._index_connection(connection)
+                if debug:
+                    logger.debug("Imported connection: %s -> %s", connection.from_node, connection.to_node)
 
                 # Update port connections if nodes exist
                 from_node = self.get_node(connection.from_node)
                 to_node = self.get_node(connection.to_node)
 
                 if from_node and to_node:
-                    from_port = next((p for p in from_node.ports if p.id == connection.from_port), None)
-                    to_port = next((p for p in to_node.ports if p.id == connection.to_port), None)
+                    from_port = from_node.get_port(connection.from_port)
+                    to_port = to_node.get_port(connection.to_port)
 
                     if from_port and to_port:
+                        # Saved ports already list their links; only count ones the save didn't record
                         if connection.to_port not in from_port.connected_to:
-                            from_port.connected_to.append(connection.to_port)
+                            from_port.link(connection.to_port)
                         if connection.from_port not in to_port.connected_to:
-                            to_port.connected_to.append(connection.from_port)
-                        print(f"Connected ports: {from_port.name} -> {to_port.name}")
+                            to_port.link(connection.from_port)
+                        if debug:
+                            logger.debug("Connected ports: %s -> %s", from_port.name, to_port.name)
                     else:
-                        print(f"Warning: Could not find ports for connection {connection.id}")
+                        logger.warning("Could not find ports for connection %s", connection.id)
                 else:
-                    print(f"Warning: Could not find nodes for connection {connection.id}")
+                    logger.warning("Could not find nodes for connection %s", connection.id)
 
-            except Exception as e:
-                print(f"Error importing connection {data.get('id', 'unknown')}: {e}")
-                import traceback
-                traceback.print_exc()
+            except Exception:
+                logger.exception("Error importing connection %s", data.get('id', 'unknown'))
 
-        print(f"Imported {len(self.connections)} connections")
+        logger.info("Imported %d connections", len(self.connections))
 
-        # Trigger connection change callback if available
-        if self.on_connection_changed:
-            for connection in self.connections.values():
-                self.on_connection_changed("add", connection)
+        # Trigger one connection change callback for the whole batch
+        if self.on_connection_changed and self.connections:
+            self.on_connection_changed("bulk_add", list(self.connections.values()))
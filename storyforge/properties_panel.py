@@ -1,20 +1,187 @@
 import pygame
 import pygame_gui
-from pygame_gui.elements import *
-from typing import Optional, Callable, Dict, Any
-
-from node_system import BaseNode
+from pygame_gui.elements import UIPanel, UILabel, UIButton, UITextEntryLine
+from pygame_gui.core import UIElement
+import itertools
+from functools import lru_cache
+from typing import Optional, Callable, Dict, Any, FrozenSet, List, Tuple
+
+from node_system import BaseNode, _MISSING
+
+# Row type for properties that are not edited as plain text
+_PROPERTY_ROW_TYPES = {
+    'id': 'readonly',
+    'node_type': 'readonly',
+    'position': 'position',
+    'priority': 'number',
+    'reward_xp': 'number',
+    'reward_gold': 'number',
+    'optional': 'checkbox',
+    'text': 'multiline',
+    'description': 'multiline'
+}
+
+# Labels that don't follow the "Title Case:" rule
+_PROPERTY_LABELS = {
+    'id': 'ID:',
+    'node_type': 'Type:'
+}
+
+
+# Characters accepted by number and position entries; the minus sign allows negative values such as
+# positions left of or above the origin, which the locale-based 'numbers' set rejects
+_NUMBER_CHARACTERS = list('-0123456789')
+
+
+def _entry_int(text_entry: UITextEntryLine) -> int:
+    """Number typed into a text entry"""
+    return int(text_entry.get_text())
+
+
+def _entry_position(text_entries: Tuple[UITextEntryLine, UITextEntryLine]) -> Tuple[int, int]:
+    """Position typed into a pair of x and y text entries"""
+    x_input, y_input = text_entries
+    return int(x_input.get_text()), int(y_input.get_text())
+
+
+# Reads the value of each text-edited row type from its input widget(s); raises ValueError for bad numbers
+_ENTRY_READERS = {
+    'text': UITextEntryLine.get_text,
+    'multiline': UITextEntryLine.get_text,
+    'number': _entry_int,
+    'position': _entry_position
+}
+
+# Passed to on_property_changed as the value when a property is deleted from the panel
+PROPERTY_DELETED = object()
+
+# Properties that are always shown
+_BASIC_PROPERTIES = ('title', 'id', 'node_type', 'position')
+
+# Properties shown for node classes that have the attribute they are keyed on
+_NODE_SPECIFIC_PROPERTIES = (
+    ('speaker', ('speaker', 'text')),
+    ('description', ('description',)),
+    ('priority', ('priority', 'reward_xp', 'reward_gold')),
+    ('optional', ('optional',))
+)
+
+
+@lru_cache(maxsize=None)
+def _class_properties(node_class: type) -> Tuple[str, ...]:
+    """Basic plus node-specific properties for a node class, probing its attributes once per class"""
+    attributes = set(dir(node_class))
+    # Non-slotted dataclass fields built by a default factory are not class attributes
+    attributes.update(getattr(node_class, '__dataclass_fields__', ()))
+    names = list(_BASIC_PROPERTIES)
+    for attribute, shown in _NODE_SPECIFIC_PROPERTIES:
+        if attribute in attributes:
+            names.extend(shown)
+    return tuple(names)
+
+
+@lru_cache(maxsize=None)
+def _node_fields(node_class: type) -> FrozenSet[str]:
+    """Names of the dataclass fields of a node class"""
+    return frozenset(getattr(node_class, '__dataclass_fields__', ()))
+
+
+@lru_cache(maxsize=256)
+def _ordered_properties(node_class: type, property_keys: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Sorted union of a node class's properties and the keys of a node's properties dict"""
+    all_properties = set(_class_properties(node_class))
+    all_properties.update(property_keys)
+    return tuple(sorted(all_properties))
+
+
+@lru_cache(maxsize=256)
+def _property_label(property_name: str) -> str:
+    """Display label for a property, e.g. 'Reward Xp:' for reward_xp"""
+    label = _PROPERTY_LABELS.get(property_name)
+    if label is None:
+        label = f"{property_name.replace('_', ' ').title()}:"
+    return label
 
 
 class PropertiesPanel(UIPanel):
+    # UIPanel instances keep a __dict__, but the panel's own attributes live in slots
+    __slots__ = ('current_node', 'property_widgets', '_shown_names', '_row_order', 'on_property_changed',
+                 '_user_event_handlers', '_input_to_prop', '_delete_to_prop', '_checkbox_to_prop',
+                 '_last_truncation', '_row_pool', '_pending_edits', '_last_flush_time', 'header_label',
+                 'add_property_button', 'properties_container', 'current_y_pos')
+
+    # Numbers for the default names of added properties
+    _custom_prop_ids = itertools.count()
+
+    # Minimum time between on_property_changed flushes; edits finished sooner are coalesced into the next one
+    _EDIT_FLUSH_MS = 16
+
+    # Row widget rects relative to the top of their row, moved into place as rows are built
+    _LABEL_RECT = pygame.Rect(5, 0, 135, 20)
+    _WIDE_LABEL_RECT = pygame.Rect(5, 0, 175, 20)
+    _DELETE_RECT = pygame.Rect(145, 0, 20, 20)
+    _INPUT_RECT = pygame.Rect(5, 22, 175, 25)
+    _VALUE_RECT = pygame.Rect(5, 22, 175, 20)
+    _DISPLAY_RECT = pygame.Rect(5, 50, 175, 60)  # Tall enough for a few lines of long text
+    _X_INPUT_RECT = pygame.Rect(5, 22, 80, 25)
+    _Y_INPUT_RECT = pygame.Rect(90, 22, 80, 25)
+    _CHECKBOX_RECT = pygame.Rect(5, 0, 135, 25)
+
+    # Value shown by each editable row type when the node has neither a property entry nor an attribute
+    _ROW_DEFAULTS = {
+        'text': "",
+        'multiline': "",
+        'number': 0,
+        'position': (0, 0),
+        'checkbox': False
+    }
+
+    # Properties whose rows get no delete button, by row type; readonly and position rows never have one
+    _UNDELETABLE_PROPERTIES = {
+        'text': frozenset(_BASIC_PROPERTIES),
+        'multiline': frozenset(('text', 'description')),
+        'number': frozenset(('priority',)),  # Keep priority as essential
+        'checkbox': frozenset()
+    }
+
+    # Space a row needs below its top edge to be shown, and the height it takes up, by row type
+    _ROW_HEIGHTS = {
+        'text': (80, 55),
+        'multiline': (120, 115),
+        'number': (55, 55),
+        'readonly': (45, 45),
+        'position': (55, 55),
+        'checkbox': (35, 35)
+    }
+
     def __init__(self, relative_rect: pygame.Rect, manager: pygame_gui.UIManager):
         super().__init__(relative_rect, starting_height=1, manager=manager)
 
         self.current_node: Optional[BaseNode] = None
         self.property_widgets: Dict[str, Dict[str, Any]] = {}
+        # Property names the rows were last laid out for, and the names that got a row, top to bottom
+        self._shown_names: Tuple[str, ...] = ()
+        self._row_order: List[str] = []
+        # Property names by the widgets that raise events for them
+        self._input_to_prop: Dict[UIElement, str] = {}
+        self._delete_to_prop: Dict[UIElement, str] = {}
+        self._checkbox_to_prop: Dict[UIElement, str] = {}
+        # (text, max_chars, result) of the last _truncate_text call that had to cut
+        self._last_truncation: Tuple[str, int, str] = ("", 0, "")
+        # Hidden rows kept for reuse, by (row type, has delete button)
+        self._row_pool: Dict[Tuple[str, bool], List[Dict[str, Any]]] = {}
 
         # Callbacks
         self.on_property_changed: Optional[Callable] = None
+        # Finished edits not yet passed to on_property_changed, by (node id, property name)
+        self._pending_edits: Dict[Tuple[str, str], Any] = {}
+        self._last_flush_time = -self._EDIT_FLUSH_MS
+
+        # Handlers for the pygame_gui user events this panel reacts to; each returns True if the element was ours
+        self._user_event_handlers: Dict[int, Callable[[UIElement], bool]] = {
+            pygame_gui.UI_TEXT_ENTRY_FINISHED: self._handle_text_entry_finished,
+            pygame_gui.UI_BUTTON_PRESSED: self._route_button
+        }
 
         # Create UI
         self._create_ui()
@@ -51,6 +218,15 @@ class PropertiesPanel(UIPanel):
 
     def set_node(self, node: Optional[BaseNode]):
         """Set the node to display properties for"""
+        self._flush_edits()
+        if node is not None and node is self.current_node:
+            # Same node: only add or drop the rows that changed, then write the current values in place
+            self._sync_rows()
+            for property_name in self._row_order:
+                self.refresh_property(property_name)
+            self.header_label.set_text(f'Properties: {node.title}')
+            return
+
         self.current_node = node
         self._clear_property_widgets()
 
@@ -60,90 +236,261 @@ class PropertiesPanel(UIPanel):
         else:
             self.header_label.set_text('Properties')
 
+    def refresh_property(self, property_name: str):
+        """Show the node's current value for one property in its existing widgets"""
+        widgets = self.property_widgets.get(property_name)
+        if not widgets or not self.current_node:
+            return
+
+        widget_type = widgets['type']
+        if widget_type == 'position':
+            x_input, y_input = widgets['input']
+            current_pos = self._property_value(property_name, widget_type)
+            self._set_entry_text(x_input, str(int(current_pos[0])))
+            self._set_entry_text(y_input, str(int(current_pos[1])))
+        elif widget_type == 'checkbox':
+            current_value = bool(self._property_value(property_name, widget_type))
+            if current_value != widgets['value']:
+                widgets['value'] = current_value
+                widgets['input'].set_text(widgets['text_on'] if current_value else widgets['text_off'])
+        elif widget_type == 'number':
+            self._set_entry_text(widgets['input'], str(self._property_value(property_name, widget_type)))
+        elif widget_type in ('text', 'multiline'):
+            current_value = str(self._property_value(property_name, widget_type))
+            self._set_entry_text(widgets['input'], current_value)
+            if 'display' in widgets:
+                widgets['display'].set_text(self._truncate_text(current_value, 200))
+
+    def _property_value(self, property_name: str, row_type: str) -> Any:
+        """The current node's value for a property: its properties entry, else the attribute, else the row default"""
+        value = self.current_node.properties.get(property_name, _MISSING)
+        if value is _MISSING:
+            value = getattr(self.current_node, property_name, self._ROW_DEFAULTS[row_type])
+        return value
+
+    @staticmethod
+    def _set_entry_text(text_entry: UITextEntryLine, text: str):
+        """Update a text entry only when its contents differ, avoiding a redraw"""
+        if text_entry.get_text() != text:
+            text_entry.set_text(text)
+
+    @staticmethod
+    def _row_elements(widgets: Dict[str, Any]):
+        """Yield every UI element making up one property row"""
+        for widget in widgets.values():
+            if hasattr(widget, 'kill'):
+                yield widget
+            elif isinstance(widget, tuple):
+                for w in widget:
+                    if hasattr(w, 'kill'):
+                        yield w
+
+    def update(self, time_delta: float):
+        """Update the panel, sending edits held back by the flush interval once it has passed"""
+        super().update(time_delta)
+        if self._pending_edits and pygame.time.get_ticks() - self._last_flush_time >= self._EDIT_FLUSH_MS:
+            self._flush_edits()
+
+    def kill(self):
+        """Kill the panel along with its pooled rows"""
+        self._flush_edits()
+        self._row_pool.clear()
+        super().kill()
+
+    def _release_row(self, widgets: Dict[str, Any]):
+        """Hide a row's widgets and keep them for reuse by a later row of the same shape"""
+        for widget in self._row_elements(widgets):
+            if widget.is_focused:
+                self.ui_manager.set_focus_set(None)
+            widget.hide()
+        self._row_pool.setdefault((widgets['type'], widgets.get('delete') is not None), []).append(widgets)
+
+    def _reuse_row(self, property_name: str, y_pos: int) -> Optional[Dict[str, Any]]:
+        """Show a pooled row for a property at y_pos, or return None if no row of its shape is pooled"""
+        row_type = _PROPERTY_ROW_TYPES.get(property_name, 'text')
+        undeletable = self._UNDELETABLE_PROPERTIES.get(row_type)
+        has_delete = undeletable is not None and property_name not in undeletable
+        pool = self._row_pool.get((row_type, has_delete))
+        if not pool:
+            return None
+
+        widgets = pool.pop()
+        self._move_row(widgets, y_pos)
+        label = _property_label(property_name)
+        if row_type == 'checkbox':
+            widgets['text_on'] = f"{label} [X]"
+            widgets['text_off'] = f"{label} [ ]"
+            widgets['value'] = None  # Forces the refresh below to set the button text
+        elif widgets['label'].text != label:
+            widgets['label'].set_text(label)
+
+        self.property_widgets[property_name] = widgets
+        if row_type == 'readonly':
+            widgets['input'].set_text(self._readonly_value(property_name))
+        else:
+            self.refresh_property(property_name)
+            expected_text = str(self._property_value(property_name, row_type))
+            if row_type == 'number' and widgets['input'].get_text() != expected_text:
+                # The entry rejected a value outside its allowed characters; only a new entry can show it
+                del self.property_widgets[property_name]
+                for widget in self._row_elements(widgets):
+                    widget.kill()
+                return None
+
+        for widget in self._row_elements(widgets):
+            widget.show()
+        return widgets
+
     def _clear_property_widgets(self):
         """Clear all property widgets"""
         for widgets in self.property_widgets.values():
-            for widget in widgets.values():
-                if hasattr(widget, 'kill'):
-                    widget.kill()
-                elif isinstance(widget, tuple):
-                    for w in widget:
-                        if hasattr(w, 'kill'):
-                            w.kill()
+            self._release_row(widgets)
         self.property_widgets.clear()
+        self._input_to_prop.clear()
+        self._delete_to_prop.clear()
+        self._checkbox_to_prop.clear()
+        self._shown_names = ()
+        self._row_order = []
         self.current_y_pos = 10
 
+    def _remove_row(self, property_name: str):
+        """Take one property row off the panel, keeping its widgets for reuse"""
+        widgets = self.property_widgets.pop(property_name, None)
+        if widgets:
+            for widget in self._row_elements(widgets):
+                self._input_to_prop.pop(widget, None)
+                self._delete_to_prop.pop(widget, None)
+                self._checkbox_to_prop.pop(widget, None)
+            self._release_row(widgets)
+        if property_name in self._row_order:
+            self._row_order.remove(property_name)
+
+    def _ensure_row(self, property_name: str, y_pos: int):
+        """Create the row for a property at y_pos, or move its existing row there"""
+        widgets = self.property_widgets.get(property_name)
+        if widgets is None:
+            widgets = self._reuse_row(property_name, y_pos)
+            if widgets is None:
+                self.current_y_pos = y_pos
+                self._create_row(property_name)
+                widgets = self.property_widgets.get(property_name)
+                if widgets is None:
+                    return
+                widgets['y'] = y_pos
+            self._index_row(property_name, widgets)
+            return
+
+        self._move_row(widgets, y_pos)
+
+    def _move_row(self, widgets: Dict[str, Any], y_pos: int):
+        """Move a row's widgets so the row starts at y_pos"""
+        offset = y_pos - widgets['y']
+        if offset:
+            for widget in self._row_elements(widgets):
+                rect = widget.get_relative_rect()
+                widget.set_relative_position((rect.x, rect.y + offset))
+            widgets['y'] = y_pos
+
+    def _index_row(self, property_name: str, widgets: Dict[str, Any]):
+        """Map a new row's event-raising widgets back to its property"""
+        widget_type = widgets['type']
+        if widget_type == 'position':
+            for text_entry in widgets['input']:
+                self._input_to_prop[text_entry] = property_name
+        elif widget_type == 'checkbox':
+            self._checkbox_to_prop[widgets['input']] = property_name
+        elif widget_type != 'readonly':
+            self._input_to_prop[widgets['input']] = property_name
+
+        if widgets.get('delete') is not None:
+            self._delete_to_prop[widgets['delete']] = property_name
+
+    def _sync_rows(self):
+        """Bring the rows in line with the current node's properties, touching only rows that changed"""
+        property_names = self._property_names(self.current_node)
+        if property_names == self._shown_names:
+            return
+
+        for property_name in [name for name in self._row_order if name not in property_names]:
+            self._remove_row(property_name)
+
+        # Lay the rows out top to bottom as a full rebuild would, leaving out those that don't fit
+        container_height = self.properties_container.relative_rect.height
+        y_pos = 10
+        row_order = []
+        for property_name in property_names:
+            space_needed, row_height = self._ROW_HEIGHTS[_PROPERTY_ROW_TYPES.get(property_name, 'text')]
+            if y_pos + space_needed > container_height:
+                self._remove_row(property_name)
+                continue
+            self._ensure_row(property_name, y_pos)
+            row_order.append(property_name)
+            y_pos += row_height
+
+        self._shown_names = property_names
+        self._row_order = row_order
+        self.current_y_pos = y_pos
+
+    @staticmethod
+    def _property_names(node: BaseNode) -> Tuple[str, ...]:
+        """Names of the properties shown for a node, in display order"""
+        # Nodes of one class with the same property keys share the merged, sorted order
+        return _ordered_properties(type(node), tuple(node.properties))
+
     def _create_property_widgets(self):
         """Create property widgets for the current node"""
         if not self.current_node:
             return
 
-        # Basic properties that should always be shown
-        basic_properties = ['title', 'id', 'node_type', 'position']
-
-        # Node-specific properties to show
-        node_specific = []
-        if hasattr(self.current_node, 'speaker'):
-            node_specific.extend(['speaker', 'text'])
-        if hasattr(self.current_node, 'description'):
-            node_specific.append('description')
-        if hasattr(self.current_node, 'priority'):
-            node_specific.extend(['priority', 'reward_xp', 'reward_gold'])
-        if hasattr(self.current_node, 'optional'):
-            node_specific.append('optional')
-
-        # Combine all properties from node.properties and direct attributes
-        all_properties = set(basic_properties + node_specific)
-        if self.current_node.properties:
-            all_properties.update(self.current_node.properties.keys())
-
-        # Create widgets for each property
-        for prop_name in sorted(all_properties):
-            if prop_name == 'id':
-                self._create_readonly_property(prop_name, "ID:", self.current_node.id)
-            elif prop_name == 'node_type':
-                self._create_readonly_property(prop_name, "Type:", self.current_node.node_type.value)
-            elif prop_name == 'position':
-                self._create_position_property(prop_name, "Position:")
-            elif prop_name in ['priority', 'reward_xp', 'reward_gold']:
-                self._create_number_property(prop_name, f"{prop_name.replace('_', ' ').title()}:")
-            elif prop_name == 'optional':
-                self._create_checkbox_property(prop_name, "Optional:")
-            elif prop_name in ['text', 'description']:
-                self._create_multiline_property(prop_name, f"{prop_name.title()}:")
-            else:
-                # Default to text property
-                self._create_text_property(prop_name, f"{prop_name.replace('_', ' ').title()}:")
-
-    def _create_text_property(self, property_name: str, label: str):
+        self._sync_rows()
+
+    def _create_row(self, prop_name: str):
+        """Create the widgets for one property at current_y_pos"""
+        row_type = _PROPERTY_ROW_TYPES.get(prop_name, 'text')
+        label = _property_label(prop_name)
+        if row_type == 'readonly':
+            self._create_readonly_property(prop_name, label, self._readonly_value(prop_name))
+        else:
+            self._ROW_FACTORIES[row_type](self, prop_name, label, self._property_value(prop_name, row_type))
+
+    def _readonly_value(self, property_name: str) -> str:
+        """Text shown by a read-only row"""
+        return self.current_node.id if property_name == 'id' else self.current_node.node_type.value
+
+    def _create_text_property(self, property_name: str, label: str, value: Any):
         """Create a text input property with delete button"""
-        if self.current_y_pos + 80 > self.properties_container.relative_rect.height:
+        space_needed, row_height = self._ROW_HEIGHTS['text']
+        if self.current_y_pos + space_needed > self.properties_container.relative_rect.height:
             return  # Don't create if it would overflow
+        y_pos = self.current_y_pos
+
+        manager = self.ui_manager
+        container = self.properties_container
 
         # Label
         label_widget = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos, 135, 20),
+            relative_rect=self._LABEL_RECT.move(0, y_pos),
             text=label,
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         # Delete button (only for non-essential properties)
         delete_button = None
-        if property_name not in ['title', 'id', 'node_type', 'position']:
+        if property_name not in self._UNDELETABLE_PROPERTIES['text']:
             delete_button = UIButton(
-                relative_rect=pygame.Rect(145, self.current_y_pos, 20, 20),
+                relative_rect=self._DELETE_RECT.move(0, y_pos),
                 text='X',
-                manager=self.ui_manager,
-                container=self.properties_container
+                manager=manager,
+                container=container
             )
 
         # Text input
-        current_value = str(self.current_node.get_property(property_name, ""))
+        current_value = str(value)
         text_input = UITextEntryLine(
-            relative_rect=pygame.Rect(5, self.current_y_pos + 22, 175, 25),
-            manager=self.ui_manager,
-            container=self.properties_container,
+            relative_rect=self._INPUT_RECT.move(0, y_pos),
+            manager=manager,
+            container=container,
             initial_text=current_value
         )
 
@@ -154,47 +501,52 @@ class PropertiesPanel(UIPanel):
             'type': 'text'
         }
 
-        self.current_y_pos += 55
+        self.current_y_pos += row_height
 
-    def _create_multiline_property(self, property_name: str, label: str):
+    def _create_multiline_property(self, property_name: str, label: str, value: Any):
         """Create a multiline text property"""
-        if self.current_y_pos + 120 > self.properties_container.relative_rect.height:
+        space_needed, row_height = self._ROW_HEIGHTS['multiline']
+        if self.current_y_pos + space_needed > self.properties_container.relative_rect.height:
             return  # Don't create if it would overflow
+        y_pos = self.current_y_pos
+
+        manager = self.ui_manager
+        container = self.properties_container
 
         # Label
         label_widget = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos, 135, 20),
+            relative_rect=self._LABEL_RECT.move(0, y_pos),
             text=label,
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         # Delete button (only for non-essential properties)
         delete_button = None
-        if property_name not in ['text', 'description']:
+        if property_name not in self._UNDELETABLE_PROPERTIES['multiline']:
             delete_button = UIButton(
-                relative_rect=pygame.Rect(145, self.current_y_pos, 20, 20),
+                relative_rect=self._DELETE_RECT.move(0, y_pos),
                 text='X',
-                manager=self.ui_manager,
-                container=self.properties_container
+                manager=manager,
+                container=container
             )
 
         # Text input (using TextEntryLine for now)
-        current_value = str(self.current_node.get_property(property_name, ""))
+        current_value = str(value)
         text_input = UITextEntryLine(
-            relative_rect=pygame.Rect(5, self.current_y_pos + 22, 175, 25),
-            manager=self.ui_manager,
-            container=self.properties_container,
+            relative_rect=self._INPUT_RECT.move(0, y_pos),
+            manager=manager,
+            container=container,
             initial_text=current_value
         )
 
         # Display area showing current content - make it bigger and better handle long text
         display_text = self._truncate_text(current_value, 200)  # Allow more characters
         text_display = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos + 50, 175, 60),  # Made taller (60 instead of 40)
+            relative_rect=self._DISPLAY_RECT.move(0, y_pos),
             text=display_text,
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         self.property_widgets[property_name] = {
@@ -205,54 +557,65 @@ class PropertiesPanel(UIPanel):
             'type': 'multiline'
         }
 
-        self.current_y_pos += 115  # Adjusted for larger display area
+        self.current_y_pos += row_height
 
     def _truncate_text(self, text: str, max_chars: int) -> str:
         """Truncate text intelligently by words when possible"""
         if len(text) <= max_chars:
             return text
 
-        # Try to truncate at word boundaries
-        truncated = text[:max_chars]
-        last_space = truncated.rfind(' ')
+        # Re-displaying unchanged text reuses the previous result
+        last_text, last_max_chars, last_result = self._last_truncation
+        if text == last_text and max_chars == last_max_chars:
+            return last_result
 
-        if last_space > max_chars * 0.7:  # If we can truncate at a word boundary without losing too much
-            return truncated[:last_space] + "..."
+        # Try to truncate at a word boundary, searching only the last 30% so not too much is lost
+        last_space = text.rfind(' ', int(max_chars * 0.7) + 1, max_chars)
+        if last_space != -1:
+            result = text[:last_space] + "..."
         else:
-            return truncated + "..."
+            result = text[:max_chars] + "..."
+
+        self._last_truncation = (text, max_chars, result)
+        return result
 
-    def _create_number_property(self, property_name: str, label: str):
+    def _create_number_property(self, property_name: str, label: str, value: Any):
         """Create a number input property"""
-        if self.current_y_pos + 55 > self.properties_container.relative_rect.height:
+        space_needed, row_height = self._ROW_HEIGHTS['number']
+        if self.current_y_pos + space_needed > self.properties_container.relative_rect.height:
             return  # Don't create if it would overflow
+        y_pos = self.current_y_pos
+
+        manager = self.ui_manager
+        container = self.properties_container
 
         # Label
         label_widget = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos, 135, 20),
+            relative_rect=self._LABEL_RECT.move(0, y_pos),
             text=label,
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         # Delete button (only for non-essential properties)
         delete_button = None
-        if property_name not in ['priority']:  # Keep priority as essential
+        if property_name not in self._UNDELETABLE_PROPERTIES['number']:
             delete_button = UIButton(
-                relative_rect=pygame.Rect(145, self.current_y_pos, 20, 20),
+                relative_rect=self._DELETE_RECT.move(0, y_pos),
                 text='X',
-                manager=self.ui_manager,
-                container=self.properties_container
+                manager=manager,
+                container=container
             )
 
         # Number input
-        current_value = str(self.current_node.get_property(property_name, 0))
+        current_value = str(value)
         number_input = UITextEntryLine(
-            relative_rect=pygame.Rect(5, self.current_y_pos + 22, 175, 25),
-            manager=self.ui_manager,
-            container=self.properties_container,
+            relative_rect=self._INPUT_RECT.move(0, y_pos),
+            manager=manager,
+            container=container,
             initial_text=current_value
         )
-        number_input.set_allowed_characters('numbers')
+        number_input.set_allowed_characters(_NUMBER_CHARACTERS)
 
         self.property_widgets[property_name] = {
             'label': label_widget,
@@ -261,27 +624,32 @@ class PropertiesPanel(UIPanel):
             'type': 'number'
         }
 
-        self.current_y_pos += 55
+        self.current_y_pos += row_height
 
     def _create_readonly_property(self, property_name: str, label: str, value: str):
         """Create a read-only property display"""
-        if self.current_y_pos + 45 > self.properties_container.relative_rect.height:
+        space_needed, row_height = self._ROW_HEIGHTS['readonly']
+        if self.current_y_pos + space_needed > self.properties_container.relative_rect.height:
             return  # Don't create if it would overflow
+        y_pos = self.current_y_pos
+
+        manager = self.ui_manager
+        container = self.properties_container
 
         # Label
         label_widget = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos, 175, 20),
+            relative_rect=self._WIDE_LABEL_RECT.move(0, y_pos),
             text=label,
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         # Value display
         value_label = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos + 22, 175, 20),
+            relative_rect=self._VALUE_RECT.move(0, y_pos),
             text=str(value),
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         self.property_widgets[property_name] = {
@@ -290,40 +658,45 @@ class PropertiesPanel(UIPanel):
             'type': 'readonly'
         }
 
-        self.current_y_pos += 45
+        self.current_y_pos += row_height
 
-    def _create_position_property(self, property_name: str, label: str):
+    def _create_position_property(self, property_name: str, label: str, value: Any):
         """Create position input (X, Y coordinates)"""
-        if self.current_y_pos + 55 > self.properties_container.relative_rect.height:
+        space_needed, row_height = self._ROW_HEIGHTS['position']
+        if self.current_y_pos + space_needed > self.properties_container.relative_rect.height:
             return  # Don't create if it would overflow
+        y_pos = self.current_y_pos
+
+        manager = self.ui_manager
+        container = self.properties_container
 
         # Label
         label_widget = UILabel(
-            relative_rect=pygame.Rect(5, self.current_y_pos, 175, 20),
+            relative_rect=self._WIDE_LABEL_RECT.move(0, y_pos),
             text=label,
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
-        current_pos = self.current_node.get_property(property_name, (0, 0))
+        current_pos = value
 
         # X coordinate
         x_input = UITextEntryLine(
-            relative_rect=pygame.Rect(5, self.current_y_pos + 22, 80, 25),
-            manager=self.ui_manager,
-            container=self.properties_container,
+            relative_rect=self._X_INPUT_RECT.move(0, y_pos),
+            manager=manager,
+            container=container,
             initial_text=str(int(current_pos[0]))
         )
-        x_input.set_allowed_characters('numbers')
+        x_input.set_allowed_characters(_NUMBER_CHARACTERS)
 
         # Y coordinate
         y_input = UITextEntryLine(
-            relative_rect=pygame.Rect(90, self.current_y_pos + 22, 80, 25),
-            manager=self.ui_manager,
-            container=self.properties_container,
+            relative_rect=self._Y_INPUT_RECT.move(0, y_pos),
+            manager=manager,
+            container=container,
             initial_text=str(int(current_pos[1]))
         )
-        y_input.set_allowed_characters('numbers')
+        y_input.set_allowed_characters(_NUMBER_CHARACTERS)
 
         self.property_widgets[property_name] = {
             'label': label_widget,
@@ -331,145 +704,183 @@ class PropertiesPanel(UIPanel):
             'type': 'position'
         }
 
-        self.current_y_pos += 55
+        self.current_y_pos += row_height
 
-    def _create_checkbox_property(self, property_name: str, label: str):
+    def _create_checkbox_property(self, property_name: str, label: str, value: Any):
         """Create a checkbox property"""
-        if self.current_y_pos + 35 > self.properties_container.relative_rect.height:
+        space_needed, row_height = self._ROW_HEIGHTS['checkbox']
+        if self.current_y_pos + space_needed > self.properties_container.relative_rect.height:
             return  # Don't create if it would overflow
+        y_pos = self.current_y_pos
+
+        manager = self.ui_manager
+        container = self.properties_container
 
-        current_value = bool(self.current_node.get_property(property_name, False))
+        current_value = bool(value)
+        text_on = f"{label} [X]"
+        text_off = f"{label} [ ]"
 
         # Delete button
         delete_button = UIButton(
-            relative_rect=pygame.Rect(145, self.current_y_pos, 20, 20),
+            relative_rect=self._DELETE_RECT.move(0, y_pos),
             text='X',
-            manager=self.ui_manager,
-            container=self.properties_container
+            manager=manager,
+            container=container
         )
 
         checkbox = UIButton(
-            relative_rect=pygame.Rect(5, self.current_y_pos, 135, 25),
-            text=f"{label} {'[X]' if current_value else '[ ]'}",
-            manager=self.ui_manager,
-            container=self.properties_container
+            relative_rect=self._CHECKBOX_RECT.move(0, y_pos),
+            text=text_on if current_value else text_off,
+            manager=manager,
+            container=container
         )
 
         self.property_widgets[property_name] = {
             'input': checkbox,
             'delete': delete_button,
             'type': 'checkbox',
-            'value': current_value
+            'value': current_value,
+            'text_on': text_on,
+            'text_off': text_off
         }
 
-        self.current_y_pos += 35
+        self.current_y_pos += row_height
+
+    # Row builders by row type; read-only rows also need their value and are built in _create_row
+    _ROW_FACTORIES = {
+        'text': _create_text_property,
+        'multiline': _create_multiline_property,
+        'number': _create_number_property,
+        'position': _create_position_property,
+        'checkbox': _create_checkbox_property
+    }
 
     def process_event(self, event: pygame.event.Event) -> bool:
         """Handle property change events"""
-        handled = super().process_event(event)
-
         if event.type == pygame.USEREVENT:
-            if event.user_type == pygame_gui.UI_TEXT_ENTRY_FINISHED:
-                self._handle_text_entry_finished(event.ui_element)
+            handler = self._user_event_handlers.get(event.user_type)
+            if handler is not None and handler(event.ui_element):
                 return True
-            elif event.user_type == pygame_gui.UI_BUTTON_PRESSED:
-                if event.ui_element == self.add_property_button:
-                    self._handle_add_property()
-                    return True
-                else:
-                    self._handle_button_pressed(event.ui_element)
-                    return True
 
-        return handled
+        return super().process_event(event)
+
+    def _route_button(self, button_element) -> bool:
+        """Send a button press to the add-property or row handler"""
+        if button_element is self.add_property_button:
+            self._handle_add_property()
+            return True
+        return self._handle_button_pressed(button_element)
 
     def _handle_add_property(self):
         """Handle adding a new property"""
         if not self.current_node:
             return
 
-        # For now, add a simple text property with a default name
-        import time
-        property_name = f"custom_prop_{int(time.time() % 10000)}"
+        # For now, add a simple text property with a default name, skipping names the node already uses
+        property_name = f"custom_prop_{next(self._custom_prop_ids)}"
+        while property_name in self.current_node.properties:
+            property_name = f"custom_prop_{next(self._custom_prop_ids)}"
 
         if self.on_property_changed:
             self.on_property_changed(self.current_node.id, property_name, "New Property")
 
-        # Refresh to show the new property
-        self.set_node(self.current_node)
+        # Add a row for the new property, moving the rows below it down
+        self._sync_rows()
 
-    def _handle_text_entry_finished(self, text_element):
-        """Handle text entry completion"""
+    def _handle_text_entry_finished(self, text_element) -> bool:
+        """Handle text entry completion, returning False if the entry isn't one of ours"""
         if not self.current_node:
+            return False
+
+        property_name = self._input_to_prop.get(text_element)
+        if property_name is None:
+            return False
+        widgets = self.property_widgets[property_name]
+
+        # Convert the typed text to the row's value type, falling back to the row default
+        row_type = widgets['type']
+        try:
+            new_value = _ENTRY_READERS[row_type](widgets['input'])
+        except ValueError:
+            new_value = self._ROW_DEFAULTS[row_type]
+
+        # Update multiline display if needed
+        if 'display' in widgets:
+            display_text = self._truncate_text(new_value, 200)
+            widgets['display'].set_text(display_text)
+
+        # Update the node property
+        self._queue_edit(property_name, new_value)
+        return True
+
+    def _queue_edit(self, property_name: str, value: Any):
+        """Hold a finished edit for on_property_changed, sending it now if the flush interval has passed"""
+        if not self.on_property_changed:
+            return
+
+        # A later edit of the same property replaces one still waiting
+        self._pending_edits[(self.current_node.id, property_name)] = value
+        if pygame.time.get_ticks() - self._last_flush_time >= self._EDIT_FLUSH_MS:
+            self._flush_edits()
+
+    def _flush_edits(self):
+        """Pass the held edits to on_property_changed"""
+        self._last_flush_time = pygame.time.get_ticks()
+        if not self._pending_edits:
             return
 
-        # Find which property this text element belongs to
-        for property_name, widgets in self.property_widgets.items():
-            widget_input = widgets['input']
-
-            if widgets['type'] == 'position':
-                x_input, y_input = widget_input
-                if text_element == x_input or text_element == y_input:
-                    try:
-                        x_val = int(x_input.get_text())
-                        y_val = int(y_input.get_text())
-                        new_value = (x_val, y_val)
-                    except ValueError:
-                        new_value = (0, 0)
-
-                    if self.on_property_changed:
-                        self.on_property_changed(self.current_node.id, property_name, new_value)
-                    break
-
-            elif widget_input == text_element:
-                new_value = text_element.get_text()
-
-                # Convert value based on type
-                if widgets['type'] == 'number':
-                    try:
-                        new_value = int(new_value)
-                    except ValueError:
-                        new_value = 0
-
-                # Update multiline display if needed
-                if widgets['type'] == 'multiline' and 'display' in widgets:
-                    display_text = self._truncate_text(new_value, 200)
-                    widgets['display'].set_text(display_text)
-
-                # Update the node property
-                if self.on_property_changed:
-                    self.on_property_changed(self.current_node.id, property_name, new_value)
+        pending_edits = self._pending_edits
+        self._pending_edits = {}
+        for (node_id, property_name), value in pending_edits.items():
+            if not self.on_property_changed:
                 break
+            self.on_property_changed(node_id, property_name, value)
+            if self.current_node is None or self.current_node.id != node_id:
+                continue
 
-    def _handle_button_pressed(self, button_element):
-        """Handle button presses (checkboxes and delete buttons)"""
+            # Show the value as the node stored it, e.g. a rejected number reset to 0
+            self.refresh_property(property_name)
+            if property_name == 'title':
+                self.header_label.set_text(f'Properties: {self.current_node.title}')
+
+    def _handle_button_pressed(self, button_element) -> bool:
+        """Handle button presses (checkboxes and delete buttons), returning False for other buttons"""
         if not self.current_node:
-            return
+            return False
 
         # Check for delete buttons
-        for property_name, widgets in self.property_widgets.items():
-            if widgets.get('delete') == button_element:
-                # Delete this property
-                if property_name in self.current_node.properties:
-                    del self.current_node.properties[property_name]
-                if hasattr(self.current_node, property_name):
-                    setattr(self.current_node, property_name, None)
-
-                # Refresh the panel
-                self.set_node(self.current_node)
-                return
+        property_name = self._delete_to_prop.get(button_element)
+        if property_name is not None:
+            # Delete this property, dropping any edit of it still waiting to be sent
+            self._pending_edits.pop((self.current_node.id, property_name), None)
+            # A node field of the same name is cleared rather than removed
+            self.current_node.properties.pop(property_name, None)
+            if property_name in _node_fields(type(self.current_node)):
+                setattr(self.current_node, property_name, None)
+
+            # Drop the row, or show the cleared value if the property is still listed
+            self._sync_rows()
+            self.refresh_property(property_name)
+
+            if self.on_property_changed:
+                self.on_property_changed(self.current_node.id, property_name, PROPERTY_DELETED)
+            return True
 
         # Check for checkbox buttons
-        for property_name, widgets in self.property_widgets.items():
-            if widgets['type'] == 'checkbox' and widgets['input'] == button_element:
-                # Toggle checkbox value
-                new_value = not widgets['value']
-                widgets['value'] = new_value
-
-                # Update button text
-                label = property_name.replace('_', ' ').title() + ':'
-                button_element.set_text(f"{label} {'[X]' if new_value else '[ ]'}")
-
-                # Update the node property
-                if self.on_property_changed:
-                    self.on_property_changed(self.current_node.id, property_name, new_value)
-                break
\ No newline at end of file
+        property_name = self._checkbox_to_prop.get(button_element)
+        if property_name is not None:
+            widgets = self.property_widgets[property_name]
+
+            # Toggle checkbox value
+            new_value = not widgets['value']
+            widgets['value'] = new_value
+
+            # Update button text
+            button_element.set_text(widgets['text_on'] if new_value else widgets['text_off'])
+
+            # Update the node property
+            if self.on_property_changed:
+                self.on_property_changed(self.current_node.id, property_name, new_value)
+            return True
+
+        return False
\ No newline at end of file
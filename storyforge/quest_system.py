@@ -1,15 +1,24 @@
 # quest_system.py - Enhanced for complex quest scenarios
-from typing import Dict, List, Tuple
+import json
+import logging
+import sys
+from collections import deque
+from operator import attrgetter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Set, TextIO, Tuple
 from dataclasses import dataclass, field
-from node_system import BaseNode, NodeType, Port
+from types import CodeType
+from node_system import (BaseNode, NodeType, Port, PortSpec, _EMPTY_TUPLE, _export_ports, _ports_from_spec,
+                         _saved_ports, compile_condition, evaluate_condition)
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class QuestObjective:
     """Enhanced quest objective"""
     id: str = ""
     description: str = ""
-    dependencies: List[str] = field(default_factory=list)
+    dependencies: Sequence[str] = _EMPTY_TUPLE  # Shared empty until the first dependency is added
     optional: bool = False
     completed: bool = False
 
@@ -23,13 +32,62 @@ class QuestObjective:
     progress_required: int = 1
     progress_type: str = "count"  # "count", "collect", "kill", "reach"
 
+    def __post_init__(self):
+        # Compile the completion condition up front; identical conditions share one code object
+        compile_condition(self.condition)
+
+    @property
+    def compiled_condition(self) -> Optional[CodeType]:
+        """Code object for the current condition, looked up in the shared compile cache"""
+        return compile_condition(self.condition)
+
+    def evaluate(self, context: Dict) -> bool:
+        """Check the completion condition against game state; objectives without one always pass"""
+        return evaluate_condition(self.condition, context)
+
+    def add_dependency(self, objective_id: str):
+        """Append a dependency, giving the objective its own list in place of the shared empty one"""
+        if isinstance(self.dependencies, list):
+            self.dependencies.append(objective_id)
+        else:
+            self.dependencies = [*self.dependencies, objective_id]
+
+
+def _intern_ids(ids: Iterable[str]) -> Sequence[str]:
+    """Interned copies of saved ids, so dependency checks against them compare by identity"""
+    return [sys.intern(item_id) for item_id in ids] or _EMPTY_TUPLE
+
+
+def _objective_from_dict(data: Dict) -> QuestObjective:
+    """Rebuild a saved objective, passing every field positionally; completion state isn't saved"""
+    get = data.get
+    return QuestObjective(sys.intern(data["id"]), get("description", ""), _intern_ids(get("dependencies") or ()),
+                          get("optional", False), False, get("condition", ""), get("auto_complete", False),
+                          get("hidden", False), get("progress_current", 0), get("progress_required", 1),
+                          get("progress_type", "count"))
+
 
-@dataclass
+# Quest and objective fields mirrored into the node's properties for the properties panel
+_QUEST_PROPERTY_FIELDS = ("description", "priority", "reward_xp", "reward_gold", "auto_start", "repeatable",
+                          "time_limit", "level_requirement", "can_fail")
+_quest_property_values = attrgetter(*_QUEST_PROPERTY_FIELDS)
+
+_OBJECTIVE_PROPERTY_FIELDS = ("description", "optional", "parent_quest", "condition", "progress_current",
+                              "progress_required", "progress_type", "auto_complete", "hidden")
+_objective_property_values = attrgetter(*_OBJECTIVE_PROPERTY_FIELDS)
+
+
+@dataclass(slots=True)
 class QuestNode(BaseNode):
     """Enhanced quest node"""
+    PORT_SPEC = (
+        PortSpec("prerequisites", "input", "quest"),
+        PortSpec("unlocks", "output", "quest")
+    )
+
     description: str = ""
     priority: int = 1
-    prerequisites: List[str] = field(default_factory=list)
+    prerequisites: Sequence[str] = _EMPTY_TUPLE
     objectives: List[QuestObjective] = field(default_factory=list)
     reward_xp: int = 0
     reward_gold: int = 0
@@ -43,10 +101,14 @@ class QuestNode(BaseNode):
 
     # Failure conditions
     can_fail: bool = False
-    failure_conditions: List[str] = field(default_factory=list)
+    failure_conditions: Sequence[str] = _EMPTY_TUPLE
 
     # Branching
-    branches: Dict[str, List[str]] = field(default_factory=dict)  # Conditional objective sets
+    branches: Dict[str, Tuple[str, ...]] = field(default_factory=dict)  # Conditional objective sets
+
+    # Membership index over prerequisites, rebuilt when the list is replaced or changes length
+    _prerequisite_set: Set[str] = field(default_factory=set, init=False, repr=False, compare=False)
+    _indexed_prerequisites: Sequence[str] = field(default=_EMPTY_TUPLE, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         self.node_type = NodeType.QUEST
@@ -55,10 +117,7 @@ class QuestNode(BaseNode):
 
         # Setup ports based on quest type
         if not self.ports:
-            ports = [
-                Port(name="prerequisites", port_type="input", data_type="quest"),
-                Port(name="unlocks", port_type="output", data_type="quest")
-            ]
+            ports = _ports_from_spec(self.PORT_SPEC)
 
             # Add failure port if quest can fail
             if self.can_fail:
@@ -71,24 +130,39 @@ class QuestNode(BaseNode):
             self.ports = ports
 
         # Update properties
-        self.properties.update({
-            "description": self.description,
-            "priority": self.priority,
-            "reward_xp": self.reward_xp,
-            "reward_gold": self.reward_gold,
-            "auto_start": self.auto_start,
-            "repeatable": self.repeatable,
-            "time_limit": self.time_limit,
-            "level_requirement": self.level_requirement,
-            "can_fail": self.can_fail
-        })
-
-
-@dataclass
+        self.properties.update(zip(_QUEST_PROPERTY_FIELDS, _quest_property_values(self)))
+
+    def _ensure_prerequisite_index(self):
+        """Rebuild the prerequisite set if self.prerequisites was replaced or changed length since the last build"""
+        prerequisites = self.prerequisites
+        if self._indexed_prerequisites is not prerequisites or len(self._prerequisite_set) != len(prerequisites):
+            self._prerequisite_set = set(prerequisites)
+            self._indexed_prerequisites = prerequisites
+
+    def add_prerequisite(self, quest_id: str) -> bool:
+        """Append a prerequisite quest id unless it is already listed, returning whether it was added"""
+        self._ensure_prerequisite_index()
+        if quest_id in self._prerequisite_set:
+            return False
+        self._prerequisite_set.add(quest_id)
+        if isinstance(self.prerequisites, list):
+            self.prerequisites.append(quest_id)
+        else:
+            # Replace the shared empty default with the quest's own list
+            self.prerequisites = self._indexed_prerequisites = [*self.prerequisites, quest_id]
+        return True
+
+
+@dataclass(slots=True)
 class ObjectiveNode(BaseNode):
     """Enhanced objective node"""
+    PORT_SPEC = (
+        PortSpec("input", "input", "objective"),
+        PortSpec("completed", "output", "objective")
+    )
+
     description: str = ""
-    dependencies: List[str] = field(default_factory=list)
+    dependencies: Sequence[str] = _EMPTY_TUPLE
     optional: bool = False
     parent_quest: str = ""
 
@@ -107,27 +181,86 @@ class ObjectiveNode(BaseNode):
 
         # Setup ports
         if not self.ports:
-            self.ports = [
-                Port(name="input", port_type="input", data_type="objective"),
-                Port(name="completed", port_type="output", data_type="objective")
-            ]
+            self.ports = _ports_from_spec(self.PORT_SPEC)
 
             # Add failure port if objective can fail
             if not self.optional:
                 self.ports.append(Port(name="failed", port_type="output", data_type="objective"))
 
         # Update properties
-        self.properties.update({
-            "description": self.description,
-            "optional": self.optional,
-            "parent_quest": self.parent_quest,
-            "condition": self.condition,
-            "progress_current": self.progress_current,
-            "progress_required": self.progress_required,
-            "progress_type": self.progress_type,
-            "auto_complete": self.auto_complete,
-            "hidden": self.hidden
-        })
+        self.properties.update(zip(_OBJECTIVE_PROPERTY_FIELDS, _objective_property_values(self)))
+
+        compile_condition(self.condition)
+
+    @property
+    def compiled_condition(self) -> Optional[CodeType]:
+        """Cached code object for the current condition text"""
+        return compile_condition(self.condition)
+
+
+# Quest and objective fields written by export_quests, in file order; ports and objectives follow the quest fields
+_QUEST_EXPORT_FIELDS = (
+    "id", "title", "description", "priority", "position", "prerequisites", "reward_xp", "reward_gold",
+    # Enhanced properties
+    "auto_start", "repeatable", "time_limit", "region_locked", "level_requirement", "can_fail",
+    "failure_conditions", "branches"
+)
+_quest_export_values = attrgetter(*_QUEST_EXPORT_FIELDS)
+
+_OBJECTIVE_EXPORT_FIELDS = (
+    "id", "description", "dependencies", "optional", "condition", "progress_current", "progress_required",
+    "progress_type", "auto_complete", "hidden"
+)
+_objective_export_values = attrgetter(*_OBJECTIVE_EXPORT_FIELDS)
+
+# Sort key for quests_by_priority
+_quest_priority = attrgetter("priority")
+
+
+class ObjectiveSpec(NamedTuple):
+    """Immutable objective layout shared by every quest built from it"""
+    id: str
+    description: str
+    dependencies: Tuple[str, ...] = ()
+    optional: bool = False
+    progress_required: int = 1
+    progress_type: str = "count"
+
+
+def _objectives_from_spec(spec: Tuple[ObjectiveSpec, ...]) -> List[QuestObjective]:
+    """Instantiate fresh objectives from a shared layout; the dependency tuples are shared until added to"""
+    return [QuestObjective(os.id, os.description, os.dependencies, os.optional,
+                           progress_required=os.progress_required, progress_type=os.progress_type)
+            for os in spec]
+
+
+# Objective layouts for the quest factories
+_DEFAULT_OBJECTIVES = (
+    ObjectiveSpec("complete_task", "Complete the main task"),
+)
+# Main quests typically have multiple objectives
+_MAIN_QUEST_OBJECTIVES = (
+    ObjectiveSpec("intro", "Listen to the briefing"),
+    ObjectiveSpec("travel", "Travel to the location", ("intro",)),
+    ObjectiveSpec("investigate", "Investigate the area", ("travel",)),
+    ObjectiveSpec("report", "Report back", ("investigate",))
+)
+# Side quests often have simpler objectives
+_SIDE_QUEST_OBJECTIVES = (
+    ObjectiveSpec("side_task", "Complete the side task", optional=True),
+)
+# Daily quests often involve collection or killing
+_DAILY_QUEST_OBJECTIVES = (
+    ObjectiveSpec("daily_task", "Complete daily task", progress_required=10, progress_type="collect"),
+)
+# Chain quests might have branching paths: a choice, then branch A and branch B
+_CHAIN_QUEST_OBJECTIVES = (
+    ObjectiveSpec("choice_point", "Make a decision"),
+    ObjectiveSpec("objective_a1", "Follow path A", ("choice_point",)),
+    ObjectiveSpec("objective_a2", "Complete path A", ("objective_a1",)),
+    ObjectiveSpec("objective_b1", "Follow path B", ("choice_point",)),
+    ObjectiveSpec("objective_b2", "Complete path B", ("objective_b1",))
+)
 
 
 class QuestManager:
@@ -136,23 +269,95 @@ class QuestManager:
     def __init__(self):
         self.quests: Dict[str, QuestNode] = {}
         self.objectives: Dict[str, ObjectiveNode] = {}
+        # Quests in prerequisite order, rebuilt on the next ordered_quests call after the graph changes
+        self._topo_cache: Optional[Tuple[QuestNode, ...]] = None
+        # Ids of the quests listing each prerequisite, rebuilt on demand after the graph changes
+        self._unlocks: Optional[Dict[str, Tuple[str, ...]]] = None
+
+    def mark_graph_changed(self) -> None:
+        """Invalidate the cached quest order and unlock index after quests or prerequisites change"""
+        self._topo_cache = None
+        self._unlocks = None
+
+    def _add_quest(self, node: QuestNode):
+        """Register a quest node"""
+        self.quests[node.id] = node
+        self.mark_graph_changed()
+
+    def remove_quest(self, node_id: str) -> bool:
+        """Remove a quest node"""
+        if self.quests.pop(node_id, None) is None:
+            return False
+        self.mark_graph_changed()
+        return True
+
+    def unlocked_by(self, quest_id: str) -> Tuple[str, ...]:
+        """Ids of the quests that list quest_id as a prerequisite"""
+        return self._unlock_index().get(quest_id, ())
+
+    def _unlock_index(self) -> Dict[str, Tuple[str, ...]]:
+        """Invert the prerequisite lists into quest ids by prerequisite"""
+        if self._unlocks is None:
+            unlocks: Dict[str, List[str]] = {}
+            for quest_id, quest in self.quests.items():
+                # A prerequisite listed twice still unlocks the quest once
+                for prerequisite in dict.fromkeys(quest.prerequisites):
+                    unlocks.setdefault(prerequisite, []).append(quest_id)
+            self._unlocks = {prerequisite: tuple(quest_ids) for prerequisite, quest_ids in unlocks.items()}
+        return self._unlocks
+
+    def quests_by_priority(self) -> List[QuestNode]:
+        """Quests from highest to lowest priority, keeping creation order among equal priorities"""
+        return sorted(self.quests.values(), key=_quest_priority, reverse=True)
+
+    def ordered_quests(self) -> Tuple[QuestNode, ...]:
+        """Quests ordered so every quest comes after its prerequisites; quests blocked by a cycle come last"""
+        if self._topo_cache is None:
+            self._topo_cache = self._rebuild_topo()
+        return self._topo_cache
+
+    def _rebuild_topo(self) -> Tuple[QuestNode, ...]:
+        """Order the quests, appending any blocked by a prerequisite cycle"""
+        order, blocked = self._prerequisite_order()
+        order.extend(self.quests[quest_id] for quest_id in blocked)
+        return tuple(order)
+
+    def _validate_dag(self):
+        """Raise ValueError if the prerequisites form a cycle, otherwise cache the quest order"""
+        order, blocked = self._prerequisite_order()
+        if blocked:
+            raise ValueError(f"Cycle detected among quests: {', '.join(blocked)}")
+        self._topo_cache = tuple(order)
+
+    def _prerequisite_order(self) -> Tuple[List[QuestNode], List[str]]:
+        """Kahn's algorithm over the prerequisites: the ordered quests, and the ids of quests it couldn't reach"""
+        quests = self.quests
+        indegree = dict.fromkeys(quests, 0)
+        unlocks = self._unlock_index()
+        for prerequisite, quest_ids in unlocks.items():
+            # Prerequisites naming unknown quests don't constrain the order
+            if prerequisite in quests:
+                for quest_id in quest_ids:
+                    indegree[quest_id] += 1
+
+        ready = deque(quest_id for quest_id, count in indegree.items() if count == 0)
+        order = []
+        while ready:
+            quest_id = ready.popleft()
+            order.append(quests[quest_id])
+            for unlocked in unlocks.get(quest_id, ()):
+                indegree[unlocked] -= 1
+                if indegree[unlocked] == 0:
+                    ready.append(unlocked)
+
+        # Quests on a cycle, or depending on one, never run out of prerequisites
+        blocked = [quest_id for quest_id, count in indegree.items() if count > 0] if len(order) < len(quests) else []
+        return order, blocked
 
     def create_quest_node(self, node_type: str, position: Tuple[int, int]) -> BaseNode:
         """Create enhanced quest-related nodes"""
-        if node_type == "quest":
-            return self._create_quest(position)
-        elif node_type == "objective":
-            return self._create_objective(position)
-        elif node_type == "main_quest":
-            return self._create_main_quest(position)
-        elif node_type == "side_quest":
-            return self._create_side_quest(position)
-        elif node_type == "daily_quest":
-            return self._create_daily_quest(position)
-        elif node_type == "chain_quest":
-            return self._create_chain_quest(position)
-        else:
-            return self._create_quest(position)
+        # Unknown types get a standard quest
+        return self._NODE_FACTORIES.get(node_type, QuestManager._create_quest)(self, position)
 
     def _create_quest(self, position: Tuple[int, int]) -> QuestNode:
         """Create a standard quest node"""
@@ -162,18 +367,11 @@ class QuestManager:
             position=position,
             priority=5,
             reward_xp=100,
-            reward_gold=50
-        )
-
-        # Add default objective
-        default_objective = QuestObjective(
-            id="complete_task",
-            description="Complete the main task",
-            progress_required=1
+            reward_gold=50,
+            objectives=_objectives_from_spec(_DEFAULT_OBJECTIVES)
         )
-        node.objectives.append(default_objective)
 
-        self.quests[node.id] = node
+        self._add_quest(node)
         return node
 
     def _create_main_quest(self, position: Tuple[int, int]) -> QuestNode:
@@ -186,19 +384,11 @@ class QuestManager:
             reward_xp=500,
             reward_gold=200,
             auto_start=True,
-            can_fail=True
+            can_fail=True,
+            objectives=_objectives_from_spec(_MAIN_QUEST_OBJECTIVES)
         )
 
-        # Main quests typically have multiple objectives
-        objectives = [
-            QuestObjective(id="intro", description="Listen to the briefing"),
-            QuestObjective(id="travel", description="Travel to the location", dependencies=["intro"]),
-            QuestObjective(id="investigate", description="Investigate the area", dependencies=["travel"]),
-            QuestObjective(id="report", description="Report back", dependencies=["investigate"])
-        ]
-        node.objectives.extend(objectives)
-
-        self.quests[node.id] = node
+        self._add_quest(node)
         return node
 
     def _create_side_quest(self, position: Tuple[int, int]) -> QuestNode:
@@ -210,18 +400,11 @@ class QuestManager:
             priority=3,
             reward_xp=150,
             reward_gold=75,
-            level_requirement=5
+            level_requirement=5,
+            objectives=_objectives_from_spec(_SIDE_QUEST_OBJECTIVES)
         )
 
-        # Side quests often have simpler objectives
-        objective = QuestObjective(
-            id="side_task",
-            description="Complete the side task",
-            optional=True
-        )
-        node.objectives.append(objective)
-
-        self.quests[node.id] = node
+        self._add_quest(node)
         return node
 
     def _create_daily_quest(self, position: Tuple[int, int]) -> QuestNode:
@@ -234,19 +417,11 @@ class QuestManager:
             reward_xp=50,
             reward_gold=25,
             repeatable=True,
-            time_limit=1440  # 24 hours in minutes
-        )
-
-        # Daily quests often involve collection or killing
-        objective = QuestObjective(
-            id="daily_task",
-            description="Complete daily task",
-            progress_required=10,
-            progress_type="collect"
+            time_limit=1440,  # 24 hours in minutes
+            objectives=_objectives_from_spec(_DAILY_QUEST_OBJECTIVES)
         )
-        node.objectives.append(objective)
 
-        self.quests[node.id] = node
+        self._add_quest(node)
         return node
 
     def _create_chain_quest(self, position: Tuple[int, int]) -> QuestNode:
@@ -259,30 +434,12 @@ class QuestManager:
             reward_xp=200,
             reward_gold=100,
             auto_start=True,  # Auto-start when previous quest completes
-            branches={"path_a": ["objective_a1", "objective_a2"],
-                      "path_b": ["objective_b1", "objective_b2"]}
+            branches={"path_a": ("objective_a1", "objective_a2"),
+                      "path_b": ("objective_b1", "objective_b2")},
+            objectives=_objectives_from_spec(_CHAIN_QUEST_OBJECTIVES)
         )
 
-        # Chain quests might have branching paths
-        base_objectives = [
-            QuestObjective(id="choice_point", description="Make a decision")
-        ]
-
-        # Branch A objectives
-        branch_a_objectives = [
-            QuestObjective(id="objective_a1", description="Follow path A", dependencies=["choice_point"]),
-            QuestObjective(id="objective_a2", description="Complete path A", dependencies=["objective_a1"])
-        ]
-
-        # Branch B objectives
-        branch_b_objectives = [
-            QuestObjective(id="objective_b1", description="Follow path B", dependencies=["choice_point"]),
-            QuestObjective(id="objective_b2", description="Complete path B", dependencies=["objective_b1"])
-        ]
-
-        node.objectives.extend(base_objectives + branch_a_objectives + branch_b_objectives)
-
-        self.quests[node.id] = node
+        self._add_quest(node)
         return node
 
     def _create_objective(self, position: Tuple[int, int]) -> ObjectiveNode:
@@ -297,21 +454,35 @@ class QuestManager:
         self.objectives[node.id] = node
         return node
 
+    # Node builders by the node type passed to create_quest_node
+    _NODE_FACTORIES = {
+        "quest": _create_quest,
+        "objective": _create_objective,
+        "main_quest": _create_main_quest,
+        "side_quest": _create_side_quest,
+        "daily_quest": _create_daily_quest,
+        "chain_quest": _create_chain_quest
+    }
+
     def create_connection(self, from_node: str, to_node: str, connection_type: str, **kwargs):
         """Create enhanced connections between quest nodes"""
+        # Ids end up in prerequisite lists and sets; interned ones compare by identity
+        from_node = sys.intern(from_node)
+        to_node = sys.intern(to_node)
         if connection_type == "prerequisite":
             # to_node requires from_node to be completed
             if to_node in self.quests:
                 quest = self.quests[to_node]
-                if from_node not in quest.prerequisites:
-                    quest.prerequisites.append(from_node)
+                if quest.add_prerequisite(from_node):
                     quest.properties["prerequisites"] = quest.prerequisites
+                    self.mark_graph_changed()
         elif connection_type == "chain":
             # Automatic progression from one quest to another
             if from_node in self.quests and to_node in self.quests:
                 to_quest = self.quests[to_node]
                 to_quest.auto_start = True
                 to_quest.prerequisites = [from_node]
+                self.mark_graph_changed()
         elif connection_type == "branch":
             # Conditional quest branching
             if from_node in self.quests:
@@ -327,78 +498,47 @@ class QuestManager:
                 quest.can_fail = True
                 quest.properties["failure_leads_to"] = to_node
 
-    def export_quests(self) -> List[Dict]:
-        """Export enhanced quests to JSON format"""
-        quests = []
-
+    def iter_export(self) -> Iterator[Dict]:
+        """Yield quests in JSON format one record at a time"""
         for quest in self.quests.values():
-            quest_data = {
-                "id": quest.id,
-                "title": quest.title,
-                "description": quest.description,
-                "priority": quest.priority,
-                "position": quest.position,
-                "prerequisites": quest.prerequisites,
-                "reward_xp": quest.reward_xp,
-                "reward_gold": quest.reward_gold,
+            quest_data = dict(zip(_QUEST_EXPORT_FIELDS, _quest_export_values(quest)))
+            quest_data["ports"] = _export_ports(quest)
+            quest_data["objectives"] = [
+                dict(zip(_OBJECTIVE_EXPORT_FIELDS, _objective_export_values(obj)))
+                for obj in quest.objectives
+            ]
+            yield quest_data
 
-                # Enhanced properties
-                "auto_start": quest.auto_start,
-                "repeatable": quest.repeatable,
-                "time_limit": quest.time_limit,
-                "region_locked": quest.region_locked,
-                "level_requirement": quest.level_requirement,
-                "can_fail": quest.can_fail,
-                "failure_conditions": quest.failure_conditions,
-                "branches": quest.branches,
-
-                # Add port data
-                "ports": [
-                    {
-                        "id": port.id,
-                        "name": port.name,
-                        "port_type": port.port_type,
-                        "data_type": port.data_type,
-                        "connected_to": port.connected_to,
-                        "position": port.position,
-                        "connection_limit": port.connection_limit,
-                        "required": port.required
-                    }
-                    for port in quest.ports
-                ],
-
-                "objectives": [
-                    {
-                        "id": obj.id,
-                        "description": obj.description,
-                        "dependencies": obj.dependencies,
-                        "optional": obj.optional,
-                        "condition": obj.condition,
-                        "progress_current": obj.progress_current,
-                        "progress_required": obj.progress_required,
-                        "progress_type": obj.progress_type,
-                        "auto_complete": obj.auto_complete,
-                        "hidden": obj.hidden
-                    }
-                    for obj in quest.objectives
-                ]
-            }
-            quests.append(quest_data)
-
-        return quests
+    def export_quests(self) -> List[Dict]:
+        """Export enhanced quests to JSON format"""
+        return list(self.iter_export())
+
+    def dump_quests(self, fp: TextIO) -> None:
+        """Write the exported quests to fp as a JSON array without building the full list"""
+        fp.write('[')
+        first = True
+        for record in self.iter_export():
+            if not first:
+                fp.write(', ')
+            json.dump(record, fp, ensure_ascii=False, sort_keys=True)
+            first = False
+        fp.write(']')
 
     def import_quests(self, quest_data: List[Dict]):
         """Import enhanced quests from JSON format"""
         self.quests.clear()
         self.objectives.clear()
+        self.mark_graph_changed()
+        restored_ports = 0
 
         for data in quest_data:
+            # Saved ports go straight to the constructor so no default ports are built and discarded
             quest = QuestNode(
-                id=data["id"],
+                id=sys.intern(data["id"]),
                 title=data.get("title", ""),
                 description=data.get("description", ""),
                 priority=data.get("priority", 1),
-                prerequisites=data.get("prerequisites", []),
+                prerequisites=_intern_ids(data.get("prerequisites", ())),
                 position=data.get("position", (100, 100)),
                 reward_xp=data.get("reward_xp", 0),
                 reward_gold=data.get("reward_gold", 0),
@@ -410,64 +550,32 @@ class QuestManager:
                 region_locked=data.get("region_locked", ""),
                 level_requirement=data.get("level_requirement", 0),
                 can_fail=data.get("can_fail", False),
-                failure_conditions=data.get("failure_conditions", []),
-                branches=data.get("branches", {})
+                failure_conditions=data.get("failure_conditions") or _EMPTY_TUPLE,
+                branches={name: tuple(_intern_ids(objective_ids))
+                          for name, objective_ids in data.get("branches", {}).items()},
+                ports=_saved_ports(data)
             )
 
             # Import objectives
-            for obj_data in data.get("objectives", []):
-                objective = QuestObjective(
-                    id=obj_data["id"],
-                    description=obj_data.get("description", ""),
-                    dependencies=obj_data.get("dependencies", []),
-                    optional=obj_data.get("optional", False),
-                    condition=obj_data.get("condition", ""),
-                    progress_current=obj_data.get("progress_current", 0),
-                    progress_required=obj_data.get("progress_required", 1),
-                    progress_type=obj_data.get("progress_type", "count"),
-                    auto_complete=obj_data.get("auto_complete", False),
-                    hidden=obj_data.get("hidden", False)
-                )
-                quest.objectives.append(objective)
-
-            # Restore ports if they exist in the saved data
+            quest.objectives.extend(map(_objective_from_dict, data.get("objectives", ())))
+
             if "ports" in data:
-                from node_system import Port
-                quest.ports = []
-                for port_data in data["ports"]:
-                    port = Port(
-                        id=port_data["id"],  # Use saved port ID
-                        name=port_data["name"],
-                        port_type=port_data["port_type"],
-                        data_type=port_data["data_type"],
-                        connected_to=port_data.get("connected_to", []),
-                        position=port_data.get("position", (0, 0)),
-                        connection_limit=port_data.get("connection_limit", -1),
-                        required=port_data.get("required", False)
-                    )
-                    quest.ports.append(port)
-                print(f"Restored {len(quest.ports)} ports for quest {quest.title}")
-
-            # Update properties
-            self._update_quest_properties(quest)
+                restored_ports += len(quest.ports)
+
+            # The constructor already mirrored the imported fields into properties
             self.quests[quest.id] = quest
 
-    @staticmethod
-    def _update_quest_properties(quest: QuestNode):
-        """Update quest properties for UI display"""
-        quest.properties.update({
-            "description": quest.description,
-            "priority": quest.priority,
-            "reward_xp": quest.reward_xp,
-            "reward_gold": quest.reward_gold,
-            "auto_start": quest.auto_start,
-            "repeatable": quest.repeatable,
-            "time_limit": quest.time_limit,
-            "level_requirement": quest.level_requirement,
-            "can_fail": quest.can_fail
-        })
+        # Refuse a save whose prerequisites loop, leaving no quests behind
+        try:
+            self._validate_dag()
+        except ValueError:
+            self.clear()
+            raise
+
+        logger.debug("QuestManager: Imported %d quests (%d saved ports restored)", len(self.quests), restored_ports)
 
     def clear(self):
         """Clear all quests and objectives"""
         self.quests.clear()
-        self.objectives.clear()
\ No newline at end of file
+        self.objectives.clear()
+        self.mark_graph_changed()
\ No newline at end of file
@@ -281,7 +281,8 @@ class NodeViewport:
         """Get the node at the given world position"""
         for node in self.node_manager.get_all_nodes():
             # Make sure node size is calculated
-            node.calculate_size(self.font)
+            if node.needs_resize:
+                node.calculate_size(self.font)
 
             node_rect = pygame.Rect(
                 node.position[0], node.position[1],
@@ -298,8 +299,8 @@ class NodeViewport:
             to_node = self.node_manager.get_node(connection.to_node)
 
             if from_node and to_node:
-                from_port = next((p for p in from_node.ports if p.id == connection.from_port), None)
-                to_port = next((p for p in to_node.ports if p.id == connection.to_port), None)
+                from_port = from_node.get_port(connection.from_port)
+                to_port = to_node.get_port(connection.to_port)
 
                 if from_port and to_port:
                     from_pos = (
@@ -358,7 +359,8 @@ class NodeViewport:
         """Get the port at the given world position"""
         for node in self.node_manager.get_all_nodes():
             # Make sure node size is calculated
-            node.calculate_size(self.font)
+            if node.needs_resize:
+                node.calculate_size(self.font)
 
             for port in node.ports:
                 port_world_pos = (
@@ -439,8 +441,9 @@ class NodeViewport:
     def _draw_nodes(self):
         """Draw all nodes using theme colors"""
         for node in self.node_manager.get_all_nodes():
-            # Calculate node size
-            node.calculate_size(self.font)
+            # Calculate node size (only when content changed)
+            if node.needs_resize:
+                node.calculate_size(self.font)
 
             screen_pos = self.world_to_screen(node.position)
             screen_size = (int(node.size[0] * self.zoom), int(node.size[1] * self.zoom))
@@ -592,8 +595,8 @@ class NodeViewport:
             to_node = self.node_manager.get_node(connection.to_node)
 
             if from_node and to_node:
-                from_port = next((p for p in from_node.ports if p.id == connection.from_port), None)
-                to_port = next((p for p in to_node.ports if p.id == connection.to_port), None)
+                from_port = from_node.get_port(connection.from_port)
+                to_port = to_node.get_port(connection.to_port)
 
                 if from_port and to_port:
                     from_pos = self.world_to_screen((